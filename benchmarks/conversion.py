@@ -0,0 +1,59 @@
+import os
+import random
+import timeit
+import argparse
+import tempfile
+
+from mesaport.Access import access_helper
+from mesaport.ProjectOps import gyre_store
+
+"""
+Micro-benchmark of the conversion of Fortran literals to Python values.
+
+Times `access_helper.toPythonType` on mixed literals and on a column of `d`-exponent floats, `toPythonTypes` on
+the same column, and `gyre_store.read_summary`, which converts the columns of GYRE summary files with `toPythonTypes`.
+No MESA or GYRE installation is needed.
+
+Usage:
+    python benchmarks/conversion.py --values 10000 --runs 20
+"""
+
+
+def perValue(seconds, runs, count):
+    return f"{seconds/runs/count*1e9:.0f} ns/value"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark of the conversion of Fortran literals.")
+    parser.add_argument("--values", type=int, default=10000, help="Number of values. Defaults to 10000.")
+    parser.add_argument("--runs", type=int, default=20, help="Number of timed runs. Defaults to 20.")
+    args = parser.parse_args()
+    random.seed(0)
+
+    mixed = ["1", "-25", "1d-4", "1.5d0", "2.5", ".true.", ".false.", "'abc'", "0.02d0", "1d99"] * (args.values//10)
+    seconds = timeit.timeit(lambda: [access_helper.toPythonType(value) for value in mixed], number=args.runs)
+    print(f"mixed literals, toPythonType:   {perValue(seconds, args.runs, len(mixed))}")
+
+    column = [f"{random.random():.6f}d-{random.randint(0, 9)}" for _ in range(args.values)]
+    seconds = timeit.timeit(lambda: [access_helper.toPythonType(value) for value in column], number=args.runs)
+    print(f"float column, toPythonType:     {perValue(seconds, args.runs, len(column))}")
+    seconds = timeit.timeit(lambda: access_helper.toPythonTypes(column), number=args.runs)
+    print(f"float column, toPythonTypes:    {perValue(seconds, args.runs, len(column))}")
+
+    fd, path = tempfile.mkstemp(suffix="-freqs.dat")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write("                    1                    2\n               M_star               R_star\n")
+            file.write("  1.9890000000E+33  6.9570000000E+10\n")
+            file.write("                    1                    2                    3                    4\n")
+            file.write("                    l                 n_pg             Re(freq)               E_norm\n")
+            for k in range(args.values):
+                file.write(f"  {k % 3} {-k} {random.random()*50:.10E} {random.random():.10E}\n")
+        seconds = timeit.timeit(lambda: gyre_store.read_summary(path), number=args.runs)
+        print(f"GYRE summary, read_summary:     {seconds/args.runs*1e3:.1f} ms for {args.values} modes")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
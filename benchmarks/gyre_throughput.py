@@ -0,0 +1,111 @@
+import os
+import io
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+"""
+Throughput of parallel `ProjectOps.runGyre` launches, measured with a stub GYRE executable.
+
+The stub is a Python script that reads the GYRE input file, checks the model file, sleeps for a fixed time and
+writes a summary file, so the benchmark measures the overhead of launching GYRE jobs rather than GYRE itself.
+A temporary project with empty GYRE profiles is created for the run and removed afterwards.
+MESA_DIR must point to a MESA installation (only its defaults files are read); GYRE_DIR is set to the stub.
+
+Usage:
+    python benchmarks/gyre_throughput.py --profiles 200 --sleep 0.05 --cores 8
+
+To compare with an older version, check it out and run the same command.
+"""
+
+STUB_GYRE = """#!{python}
+import re, sys, time
+text = open(sys.argv[1]).read()
+model = re.search(r"^\\s*file\\s*=\\s*'([^']*)'", text, re.M).group(1)
+open(model).close()
+summary = re.search(r"&ad_output.*?summary_file\\s*=\\s*'([^']*)'", text, re.S).group(1)
+time.sleep({sleep})
+with open(summary, "w") as file:
+    file.write("1 2\\nl n_pg freq\\n0 -1 1.0\\n0 -2 2.0\\n")
+"""
+
+GYRE_IN = """&constants
+/
+
+&model
+  model_type = 'EVOL'
+  file = 'spb.mesa'
+  file_format = 'MESA'
+/
+
+&mode
+  l = 0
+/
+
+&osc
+/
+
+&scan
+  grid_type = 'LINEAR'
+  freq_min = 0.5
+  freq_max = 50
+  n_freq = 500
+/
+
+&grid
+/
+
+&ad_output
+  summary_file = 'summary.txt'
+  summary_item_list = 'l,n_pg,freq'
+/
+
+&nad_output
+/
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of parallel runGyre launches with a stub GYRE.")
+    parser.add_argument("--profiles", type=int, default=200, help="Number of profiles. Defaults to 200.")
+    parser.add_argument("--sleep", type=float, default=0.05, help="Work per GYRE job in seconds. Defaults to 0.05.")
+    parser.add_argument("--cores", type=int, default=8, help="n_cores of runGyre. Defaults to 8.")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="gyre_throughput_")
+    try:
+        gyre = os.path.join(root, "gyre", "bin", "gyre")
+        os.makedirs(os.path.dirname(gyre))
+        with open(gyre, "w") as file:
+            file.write(STUB_GYRE.format(python=sys.executable, sleep=args.sleep))
+        os.chmod(gyre, 0o755)
+        logs = os.path.join(root, "work", "LOGS")
+        os.makedirs(logs)
+        for i in range(1, args.profiles + 1):
+            with open(os.path.join(logs, f"profile{i}.data.GYRE"), "w") as file:
+                file.write("x")
+        gyre_in = os.path.join(root, "gyre.in")
+        with open(gyre_in, "w") as file:
+            file.write(GYRE_IN)
+
+        ## Set before the import, runGyre copies the environment at import time
+        os.environ["GYRE_DIR"] = os.path.join(root, "gyre")
+        os.environ.setdefault("OMP_NUM_THREADS", "1")
+        from mesaport import ProjectOps
+
+        proj = ProjectOps(os.path.join(root, "work"))
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            proj.runGyre(gyre_in, files="all", parallel=True, n_cores=args.cores)
+        elapsed = time.perf_counter() - start
+        done = len([name for name in os.listdir(logs) if name.endswith("-freqs.dat")])
+        print(f"{args.profiles} jobs: {elapsed:.2f} s, {args.profiles/elapsed:.1f} jobs/s, {done} summaries")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
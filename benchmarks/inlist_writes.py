@@ -0,0 +1,61 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+"""
+Benchmark of batched `MesaAccess` inlist writes.
+
+Copies the default work directory of a MESA installation ($MESA_DIR/star/work) into a number of temporary projects
+and sets the same controls on each, once with one `set` call per key and once with a single `set` of all keys,
+which validates every key first and then writes each inlist file in one pass.
+MESA_DIR must point to a MESA installation.
+
+Usage:
+    python benchmarks/inlist_writes.py --projects 100 --keys 50
+
+To compare with an older version, check it out and run the same command.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of batched MesaAccess inlist writes.")
+    parser.add_argument("--projects", type=int, default=100, help="Number of projects. Defaults to 100.")
+    parser.add_argument("--keys", type=int, default=50, help="Number of controls set per project, at most 99. Defaults to 50.")
+    args = parser.parse_args()
+
+    from mesaport import MesaAccess
+
+    work = os.path.join(os.environ["MESA_DIR"], "star", "work")
+    values = {f"x_ctrl({i})": float(i) for i in range(1, min(args.keys, 99) + 1)}
+    root = tempfile.mkdtemp(prefix="inlist_writes_")
+    try:
+        projects = []
+        for i in range(args.projects):
+            projects.append(os.path.join(root, f"{i:05d}"))
+            shutil.copytree(work, projects[-1])
+        ## One access object per project, so that the defaults and the parsing are not timed
+        stars = [MesaAccess(project) for project in projects]
+
+        start = time.perf_counter()
+        for star in stars:
+            for key, value in values.items():
+                star.set(key, value)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for star in stars:
+            star.set({key: value + 1 for key, value in values.items()})
+        batched = time.perf_counter() - start
+
+        for star in stars[:1]:
+            assert star.get(list(values)) == [value + 1 for value in values.values()]
+        print(f"{args.projects} projects x {len(values)} keys: one set per key {single:.3f} s, "
+              f"one set of all keys {batched:.3f} s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
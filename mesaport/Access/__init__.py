@@ -3,11 +3,15 @@ This module provides access to the MESA inlists, GYRE input files and other file
 
 Sub-submodules:
     MesaAccess: Provides access to the MESA inlists. Also allows loading of Inlists, History and Profile columns files.
+    MesaBinaryAccess: Provides access to the inlists of the binary system and both stars of a binary project.
     GyreAccess: Provides access to the GYRE input files.
+    InlistGrid: Renders the inlists of many projects (e.g. a parameter grid) from one base project.
 """
 
 from .mesa_access import MesaAccess
+from .binary_access import MesaBinaryAccess
 from .gyre_access import GyreAccess
+from .grid import InlistGrid
 from .envhandler import MesaEnvironmentHandler
-from . import loader, access_helper
+from . import loader, access_helper, cache
 
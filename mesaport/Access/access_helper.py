@@ -3,8 +3,17 @@ import re
 from .support import *
 
 
+regex_arrayParameter = re.compile(r"^(\w+)\(([^()]+)\)$") # regex for indexed array parameters, e.g. x_ctrl(1)
+regex_floatingValue = re.compile(r"([-\d\.\d]+)[deDE]([\+\-\d]*)") # regex for floating point values
+regex_integerValue = re.compile(r"[-+]?\d+$") # regex for integer values
+regex_includeFlag = re.compile(r"^read_extra_(\w+?)_inlist(?:\((\d+)\)|(\d+))$") # e.g. read_extra_controls_inlist(1) or read_extra_controls_inlist1
+regex_includeName = re.compile(r"^extra_(\w+?)_inlist(?:_name\((\d+)\)|(\d+)_name)$") # e.g. extra_controls_inlist_name(1) or extra_controls_inlist1_name
+
+
 def readDefaults(filename, defaultsDir):
     """Reads the defaults files and returns a dictionary with all the parameters and their values.
+    Array parameters such as `x_ctrl(:)` or `Text_Summary1_name(:,:)` are stored once under their
+    pattern name and resolved for any index by `arrayPattern`.
 
     Args:
         filename (str): The name of the defaults file.
@@ -28,49 +37,167 @@ def readDefaults(filename, defaultsDir):
                         line = line.split("!")[0]
                     name, _, var = line.strip().partition("=")
                     defaultParameters[name] = var
-                    if "(:)" in name:
-                        # print(name)
-                        for i in range(1, 101):
-                            name_ = name.replace("(:)", f"({i})")
-                            defaultParameters[name_] = var
 
     # pprint(defaultParameters)
     return defaultParameters
 
 
 
-def matchtoDefaults(parameter, defaultsDict, sections):
+def arrayPattern(parameter):
+    """Returns the pattern name of an indexed array parameter, e.g. `x_ctrl(:)` for `x_ctrl(12)`.
+
+    Args:
+        parameter (str): The parameter name.
+
+    Returns:
+        str: The pattern name, or None if the parameter is not an indexed array parameter.
+    """
+    match = regex_arrayParameter.match(parameter)
+    if match is None:
+        return None
+    indices = match.group(2).split(",")
+    for index in indices:
+        try:
+            int(index)
+        except ValueError:
+            return None
+    return f"{match.group(1)}({','.join(':' for _ in indices)})"
+
+
+def buildDefaultsIndex(defaultsDict, sections):
+    """Builds an index of the defaults, mapping each parameter to its section and typed default value.
+    If a parameter appears in several sections, the first section in `sections` wins.
+
+    Args:
+        defaultsDict (dict): A dictionary with all the parameters and their values for each section.
+        sections (list): A list with the sections of the defaults files.
+
+    Returns:
+        dict: A dictionary mapping each parameter to a tuple of (section, default value, default type).
+              Default values that cannot be converted are kept as strings with type None.
+    """
+    defaultsIndex = {}
+    for section in sections:
+        for parameter, value in defaultsDict[section].items():
+            if parameter not in defaultsIndex:
+                try:
+                    value_ = toPythonType(value)
+                    defaultsIndex[parameter] = (section, value_, type(value_))
+                except (AttributeError, IndexError, ValueError):
+                    ## Raised again by matchtoDefaults if the parameter is ever looked up
+                    defaultsIndex[parameter] = (section, value, None)
+    return defaultsIndex
+
+
+def readGyreDefaults(defaultsFiles):
+    """Reads the GYRE reference guide input files and returns the parameters of each namelist section.
+
+    Args:
+        defaultsFiles (list): Paths to the .rst files of the GYRE input files reference guide.
+
+    Returns:
+        dict: A dictionary with the parameters of each section, e.g. {"&model": [...]}.
+    """
+    section_parameters = {}
+    for filename in defaultsFiles:
+        params = []
+        sections = []
+        with open(filename) as file:
+            for line in file:
+                if ":nml_g:" in line:
+                    splits = line.split(":nml_g:")
+                    for s in splits:
+                        if "`" in s:
+                            sections.append("&"+s.split("`")[1])
+                if ":nml_n:" in line:
+                    params.append(line.split(":nml_n:")[1].split("`")[1])
+        for section in sorted(set(sections)):
+            section_parameters[section] = params
+    return section_parameters
+
+
+def buildGyreIndex(section_parameters):
+    """Builds an index of the GYRE parameters, mapping each parameter to its section.
+    If a parameter appears in several sections, the last section wins.
+
+    Args:
+        section_parameters (dict): The parameters of each section, as returned by `readGyreDefaults`.
+
+    Returns:
+        dict: A dictionary mapping each parameter to its section.
+    """
+    gyreIndex = {}
+    for section, params in section_parameters.items():
+        for parameter in params:
+            gyreIndex[parameter] = section
+    return gyreIndex
+
+
+def matchtoDefaults(parameter, defaultsIndex):
     """Returns the section of the defaults file where the parameter is located.
 
     Args:
         parameter (str): The parameter to be searched for.
-        defaultsDict (dict): A dictionary with all the parameters and their values.
-        sections (list): A list with the sections of the defaults file.
+        defaultsIndex (dict): The index of the defaults, as built by `buildDefaultsIndex`.
 
     Raises:
         KeyError: If the parameter does not exist in the defaults files.
 
     Returns:
-        str: The section of the defaults file where the parameter is located.
+        str, object, type: The section of the defaults file where the parameter is located,
+                           its default value and the type of the default value.
     """    
-    for section in sections:
-        if parameter in defaultsDict[section]:
-            return section, toPythonType(defaultsDict[section][parameter]),\
-                     type(toPythonType(defaultsDict[section][parameter]))
-    else:
-        raise KeyError(f"Parameter {parameter} does not exist in the defaults files.")
+    entry = defaultsIndex.get(parameter)
+    if entry is None:
+        entry = defaultsIndex.get(arrayPattern(parameter))
+        if entry is None:
+            raise KeyError(f"Parameter {parameter} does not exist in the defaults files.")
+    section, value, value_type = entry
+    if value_type is None:
+        value = toPythonType(value)
+        value_type = type(value)
+    return section, value, value_type
+
+def includedFiles(section, values):
+    """Returns the extra inlists that MESA reads after a namelist section, from its
+    `read_extra_<section>_inlist(i)` and `extra_<section>_inlist_name(i)` parameters
+    (or the older `read_extra_<section>_inlist<i>` and `extra_<section>_inlist<i>_name` forms).
+
+    Args:
+        section (str): The namelist section.
+        values (dict): The parameters and their Fortran values set in the section of one file.
+
+    Returns:
+        list: The file names of the extra inlists, in the order MESA reads them.
+    """
+    flags, names = {}, {}
+    for parameter, value in values.items():
+        for regex, found in ((regex_includeFlag, flags), (regex_includeName, names)):
+            match = regex.match(parameter)
+            if match is not None and match.group(1) == section:
+                found[int(match.group(2) or match.group(3))] = value
+    files = []
+    for i in sorted(flags):
+        try:
+            read = toPythonType(flags[i])
+        except (AttributeError, IndexError):
+            read = False
+        if read is True and i in names:
+            name = toPythonType(names[i])
+            if name and name != "undefined":
+                files.append(name)
+    return files
+
 
 def getFilename(astero, binary, default_section, inlist_filenames):
-        if not binary:
-            if default_section in ["star_job", "controls"]:
-                filename = "inlist_project"
-            elif default_section == "pgstar":
-                filename = "inlist_pgstar"
-        if astero:
-            if default_section == "astero_search_controls" or default_section == "astero_pgstar_controls":
-                filename = "inlist_astero_search_controls"
-        else:
+        if binary:
             filename = inlist_filenames[0]
+        elif default_section == "pgstar":
+            filename = "inlist_pgstar"
+        elif astero and default_section in ["astero_search_controls", "astero_pgstar_controls"]:
+            filename = "inlist_astero_search_controls"
+        else:
+            filename = "inlist_project"
         return filename
 
 
@@ -86,30 +213,62 @@ def toPythonType(data):
     Returns:
         type: The type of the value.
     """
-    regex_floatingValue = r"([-\d\.\d]+)[deDE]([\+\-\d]*)" # regex for floating point values
-    if data[0] == "." and data[-1] == ".": # return boolean
-        return True if data[1:-1] == "true" else False
-    elif data[0] == "'": # return string
+    first = data[0]
+    if first == "." and data[-1] == ".": # return boolean
+        return data[1:-1].lower() in ("true", "t")
+    elif first == "'" or first == '"': # return string
         return data[1:-1]
-    elif re.compile(regex_floatingValue).match(data) is not None:
-        matches = re.compile(regex_floatingValue).findall(data)
-        if matches[0][1] == "":
-            power = 0
-        else:
-            power = float(matches[0][1])
-        return float(matches[0][0])*pow(10, power)
+    elif regex_integerValue.match(data) is not None:
+        return int(data)
+    match = regex_floatingValue.match(data)
+    if match is not None:
+        try:
+            return float(data.replace("d", "e").replace("D", "e"))
+        except ValueError:
+            ## Not a complete literal, use the matched part only
+            mantissa, power = match.groups()
+            return float(mantissa)*pow(10, float(power) if power != "" else 0)
     elif "." in data:
         try:
             return float(data)
-        except:
+        except ValueError:
             return str(data)
     else:
         try:
             return int(data)
-        except:
+        except ValueError:
             raise AttributeError(f"Cannot convert {data} to known type!")
 
 
+def toPythonTypes(data):
+    """Converts a column of Fortran literals to 'Python' types in one call.
+    Columns of plain integers become ints and numeric columns, including `1d-4`-style exponents, become floats.
+    Any other column is converted value by value with `toPythonType`.
+
+    Args:
+        data (iterable of str): The values to be converted.
+
+    Raises:
+        AttributeError: If a value cannot be converted to a known type.
+
+    Returns:
+        list: The converted values.
+    """
+    data = list(data)
+    try:
+        return list(map(int, data))
+    except ValueError:
+        pass
+    ## Convert the exponents of the whole column at once
+    joined = " ".join(data).replace("d", "e").replace("D", "e").split(" ")
+    try:
+        if len(joined) == len(data):
+            return list(map(float, joined))
+    except ValueError:
+        pass
+    return [toPythonType(value) for value in data]
+
+
 def toFortranType(data):
     """Converts the value to a 'Fortran' type.
 
@@ -123,16 +282,11 @@ def toFortranType(data):
         str: The value converted to a 'Fortran' type.
     """    
     if isinstance(data, bool):
-        return "." + ("true" if data else "false") + "."
+        return ".true." if data else ".false."
     elif isinstance(data, str):
         return "'"+data+"'"
     elif isinstance(data, float):
-        if "e" in str(data):
-            return str(data).replace("e", "d")
-        elif "E" in str(data):
-            return str(data).replace("E", "d")
-        else:
-            return str(data)
+        return repr(data).replace("e", "d")
     elif isinstance(data, int):
         return str(data)
     else:
@@ -158,117 +312,3 @@ def matchTypes(inputType, defaultType):
         return True
     else:
         return False
-
-
-def matchtoFile(parameter, inlistDict, sections, default_section):
-    """Returns the section of the inlist file where the parameter is located.
-
-    Args:
-        parameter (str): The parameter to be searched for.
-        inlistDict (dict): A dictionary with all the parameters and their values.
-        sections (list): A list with the sections of the inlist file.
-
-    Returns:
-        bool, str: A tuple with a boolean indicating if the parameter exists in the inlist file 
-                    and the section of the inlist file where the parameter is located.
-    """    
-    for section in sections:
-        if parameter in inlistDict[section] and section == default_section:
-            return True, toPythonType(inlistDict[section][parameter])
-    else:
-        return False, None
-
-
-
-def readFile(inlist, projectDir):
-    """Reads the inlist file and returns a dictionary with all the parameters and their values.
-
-    Args:
-        inlist (str): The path to the inlist file.
-
-    Raises:
-        FileNotFoundError: If the inlist file does not exist.
-
-    Returns:
-        dict : A dictionary with all the parameters and their values.
-    """    
-    with cwd(projectDir):
-        if not os.path.exists(inlist):
-            raise FileNotFoundError(f"Inlist {inlist} does not exist.")
-        else:
-            inlistParameters = {}
-            inlistSections = []
-            section = ""
-            with open(inlist) as file:
-                for line in file:
-                    line = line.strip().replace(" ", "")
-                    if line.startswith("&"):
-                        section = line.split("&")[1].split()[0]
-                        inlistParameters[section] = {}
-                        inlistSections.append(section)
-                    elif not line.startswith("!") and not line.startswith("/") and line != "":
-                        line = line.replace(" ", "")
-                        if "!" in line:
-                            line = line.split("!")[0]
-                        name, _, value = line.partition("=")
-                        if section != "":
-                            inlistParameters[section][name] = value
-                        else:
-                            print("Something went wrong, section not found!")
-        # pprint(inlistParameters)
-        return inlistSections, inlistParameters
-
-
-
-
-def writetoFile(projectDir, filename, parameter, value, exists, default_section, delete=False):
-    """Writes the parameter and its value to the inlist file.
-
-    Args:
-        projectDir (str): The path to the project directory.
-        filename (str): The name of the inlist file.
-        parameter (str): The parameter to be written to the inlist file.
-        value (str): The value of the parameter to be written to the inlist file.
-        exists (bool): A boolean indicating if the parameter exists in the inlist file.
-        default_section (str): The default section of the inlist file.
-        delete (bool, optional): A boolean indicating if the parameter should be deleted from the inlist file. Defaults to False.
-    """    
-    value = toFortranType(value)
-    this_section = False
-    with cwd(projectDir):
-        with open(filename, "r") as file:
-            lines = file.readlines()
-        with open(filename, "w+") as f:
-            indent = "    "
-            for line in lines:
-                if line.startswith("&"):
-                    if '&' + default_section in line:
-                        this_section = True
-                        # print("Writing to section: " + default_section)
-                    else:
-                        this_section = False
-                        # print("skip section: " + line.split("&")[1].split()[0])
-                if this_section:
-                    if exists and parameter in line:
-                        if parameter == line.split("=")[0].strip():
-                            if not delete:
-                                f.write(line.replace(line.split("=")[1], f" {value}    ! Changed\n"))
-                            else:
-                                f.write(indent)
-                                f.write(f"! {parameter} = {value}    ! Removed\n")
-                    elif not exists and line.startswith("/"):
-                        f.write(indent)
-                        f.write(f"{parameter} = {value}    ! Added\n")
-                        f.write("/\n")
-                        this_section = False
-                    else:
-                        f.write(line)
-                else:
-                    f.write(line)
-                
-                
-            
-        
-
-
-
@@ -0,0 +1,182 @@
+from contextlib import contextmanager, ExitStack
+
+from .mesa_access import MesaAccess
+
+"""
+This module defines the `MesaBinaryAccess` class, which handles access to all inlists of a MESA binary project.
+
+The binary system, the primary and the secondary star are accessed through one object. Every key is routed by an
+explicit target to `inlist_project`, `inlist1` or `inlist2`. The binary and star defaults are loaded once from the
+shared defaults registry (the primary and the secondary share the same star defaults) and each inlist file is
+parsed once, so configuring a binary costs about as much as configuring a single star.
+
+Attributes:
+    project (str): Name of the project.
+    targets (list): The targets, 'binary', 'primary' and 'secondary'.
+
+Methods:
+    set(*arg, target, force=False): Sets values in the inlist of a target.
+    get(items, target): Gets values from the inlist of a target.
+    getSource(items, target): Gets the inlist files values of a target are read from.
+    delete(keys, target): Deletes values from the inlist of a target.
+    setDefault(keys, target): Sets values of a target to default.
+    getDefault(keys, target): Gets default values of a target.
+    batch(): Context manager that keeps all changes to all three inlists in memory and writes them on exit.
+    flush(): Writes all changed inlist files to disk.
+    load_InlistProject(inlistPath, target): Loads the inlist file of a target.
+    load_HistoryColumns(HistoryColumns, target): Loads the history columns of a target.
+    load_Extras(extras_path, target): Loads the run_star_extras or run_binary_extras file.
+"""
+
+class MesaBinaryAccess:
+    targets = ['binary', 'primary', 'secondary']
+
+    def __init__(self, project):
+        """Initializes the MesaBinaryAccess class.
+
+        Args:
+            project (str): Path to the binary project.
+        """
+        self.project = project
+        self.access = {target: MesaAccess(project, binary=True, target=target) for target in self.targets}
+        self.projectDir = self.access['binary'].projectDir
+
+
+    def __getitem__(self, target):
+        """Returns the `MesaAccess` object of a target."""
+        return self.target(target)
+
+
+    def target(self, target):
+        """Returns the `MesaAccess` object of a target.
+
+        Args:
+            target (str): 'binary', 'primary' or 'secondary'.
+
+        Raises:
+            ValueError: If the target is invalid.
+
+        Returns:
+            MesaAccess: The access object of the target.
+        """
+        if target not in self.access:
+            raise ValueError(f"Invalid target '{target}'. Use 'binary', 'primary' or 'secondary'.")
+        return self.access[target]
+
+
+    @contextmanager
+    def batch(self):
+        """Keeps all changes made inside the `with` block in memory and writes them on exit,
+        with a single write per inlist file.
+        If the block raises an exception, the changes to all three inlists are discarded and nothing is written.
+        """
+        with ExitStack() as stack:
+            for access in self.access.values():
+                stack.enter_context(access.batch())
+            yield
+
+
+    def flush(self):
+        """Writes all changed inlist files to disk, each in a single write.
+        """
+        for access in self.access.values():
+            access.flush()
+
+
+    def set(self, *arg, target, force=False):
+        """Sets values in the inlist of a target. See `MesaAccess.set` for the forms of the arguments.
+
+        Args:
+            target (str): 'binary', 'primary' or 'secondary'.
+            force (bool, optional): Skip the type check against the defaults. Defaults to False.
+        """
+        self.target(target).set(*arg, force=force)
+
+
+    def get(self, items, target):
+        """Gets values from the inlist of a target.
+
+        Args:
+            items (str or list): Key of the value to get.
+            target (str): 'binary', 'primary' or 'secondary'.
+
+        Returns:
+            str or list: Value or list of values.
+        """
+        return self.target(target).get(items)
+
+
+    def getSource(self, items, target):
+        """Gets the inlist files values of a target are read from.
+
+        Args:
+            items (str or list): Key of the value.
+            target (str): 'binary', 'primary' or 'secondary'.
+
+        Returns:
+            str or list: Path of the file or list of paths.
+        """
+        return self.target(target).getSource(items)
+
+
+    def delete(self, keys, target):
+        """Deletes values from the inlist of a target.
+
+        Args:
+            keys (str or list): Key of the value to delete.
+            target (str): 'binary', 'primary' or 'secondary'.
+        """
+        self.target(target).delete(keys)
+
+
+    def setDefault(self, keys, target):
+        """Sets values of a target to default.
+
+        Args:
+            keys (str or list): Key of the value to set.
+            target (str): 'binary', 'primary' or 'secondary'.
+        """
+        self.target(target).setDefault(keys)
+
+
+    def getDefault(self, keys, target):
+        """Gets default values of a target.
+
+        Args:
+            keys (str or list): Key of the value to get.
+            target (str): 'binary', 'primary' or 'secondary'.
+
+        Returns:
+            str or list: Value or list of values.
+        """
+        return self.target(target).getDefault(keys)
+
+
+    def load_InlistProject(self, inlistPath, target):
+        """Loads the inlist file of a target: `inlist_project` for the binary, `inlist1` or `inlist2` for the stars.
+
+        Args:
+            inlistPath (str): Path to the inlist file.
+            target (str): 'binary', 'primary' or 'secondary'.
+        """
+        self.target(target).load_InlistProject(inlistPath)
+
+
+    def load_HistoryColumns(self, HistoryColumns, target):
+        """Loads the history columns of a target.
+
+        Args:
+            HistoryColumns (str): Path to the history columns file.
+            target (str): 'binary', 'primary' or 'secondary'.
+        """
+        self.target(target).load_HistoryColumns(HistoryColumns)
+
+
+    def load_Extras(self, extras_path, target):
+        """Loads the run_binary_extras file for the binary, or the run_star_extras file for the stars.
+
+        Args:
+            extras_path (str): Path to the extras file.
+            target (str): 'binary', 'primary' or 'secondary'.
+        """
+        self.target(target).load_Extras(extras_path)
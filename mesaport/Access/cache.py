@@ -0,0 +1,251 @@
+import os
+import glob
+import hashlib
+import pickle
+import tempfile
+from collections import OrderedDict, namedtuple
+from threading import RLock
+from types import MappingProxyType
+
+from .support import *
+from .access_helper import readDefaults, buildDefaultsIndex, readGyreDefaults, buildGyreIndex
+from .envhandler import MesaEnvironmentHandler
+
+"""
+This module handles the on-disk cache of parsed MESA defaults files and the process-wide defaults registry.
+
+The parsed defaults are pickled into a user cache directory, keyed by the MESA version,
+the defaults directory and the modification times and sizes of the defaults files.
+The cache is rebuilt automatically whenever any of these change.
+
+Within a process, the parsed defaults are shared by all `MesaAccess` instances through a registry keyed by
+(MESA_DIR, astero, binary target). The registry holds at most `REGISTRY_SIZE` entries, least recently used first out.
+The GYRE parameter table, parsed from the reference guide of the GYRE installation, is cached and shared the same way,
+keyed by GYRE_DIR and the modification times of the reference guide files.
+
+Environment variables:
+    MESAPORT_CACHE_DIR: Directory for the cache files. Defaults to $XDG_CACHE_HOME/mesaport or ~/.cache/mesaport.
+    MESAPORT_DISABLE_CACHE: If set to a non-empty value, the on-disk cache is neither read nor written.
+
+Methods:
+    cacheDir(): Returns the cache directory.
+    mesaVersion(mesaDir): Returns the version of a MESA installation.
+    loadCached(kind, key, paths, build): Loads data from the cache or builds and caches it.
+    loadDefaults(mesaDir, defaultsDir, sections, defaultsFileNames): Loads the parsed defaults of all sections.
+    sharedDefaults(astero=False, binary=False, target=''): Returns the shared, read-only defaults for a project type.
+    invalidateDefaults(mesaDir=None): Drops registry entries, forcing the defaults to be reloaded.
+    gyreDefaultsFiles(gyreDir): Returns the reference guide files of the GYRE input files.
+    sharedGyreDefaults(gyreDir=None): Returns the shared, read-only GYRE parameter table.
+"""
+
+## Bump this whenever the layout of the cached data changes
+CACHE_FORMAT = 2
+
+## Maximum number of MESA installations/project types kept in the defaults registry
+REGISTRY_SIZE = 8
+
+SharedDefaults = namedtuple("SharedDefaults", ["mesaDir", "defaultsDir", "sections", "defaultsFileNames", "defaults", "index"])
+SharedGyreDefaults = namedtuple("SharedGyreDefaults", ["gyreDir", "sections", "index"])
+
+_registry = OrderedDict()
+_registry_lock = RLock()
+_gyre_registry = {}
+
+
+def cacheDir():
+    """Returns the directory used for the on-disk caches.
+
+    Returns:
+        str: Path to the cache directory.
+    """
+    path = os.environ.get("MESAPORT_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "mesaport")
+    return path
+
+
+def mesaVersion(mesaDir):
+    """Returns the version of a MESA installation.
+
+    Args:
+        mesaDir (str): Path to the MESA directory.
+
+    Returns:
+        str: The MESA version, or None if it cannot be determined.
+    """
+    try:
+        with open(os.path.join(mesaDir, "data", "version_number")) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def fileSignature(paths):
+    """Returns the modification times and sizes of a list of files.
+
+    Args:
+        paths (list): Paths to the files.
+
+    Returns:
+        tuple: A tuple of (path, mtime, size) for each file. Missing files have mtime and size None.
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def loadCached(kind, key, paths, build):
+    """Loads data from the on-disk cache, or builds and caches it if the cache is missing or stale.
+
+    Args:
+        kind (str): Kind of the cached data, used as a prefix for the cache file name.
+        key (tuple): Key identifying the cached data.
+        paths (list): Paths to the files the data is built from. The cache is stale if any of them changed.
+        build (callable): Function that builds the data when the cache cannot be used.
+
+    Returns:
+        The cached or freshly built data.
+    """
+    if os.environ.get("MESAPORT_DISABLE_CACHE"):
+        return build()
+    signature = (CACHE_FORMAT, key, fileSignature(paths))
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    cacheFile = os.path.join(cacheDir(), f"{kind}-{digest}.pickle")
+    try:
+        with open(cacheFile, "rb") as file:
+            payload = pickle.load(file)
+        if payload["signature"] == signature:
+            return payload["data"]
+    except Exception:
+        ## Missing, unreadable or corrupt cache, rebuild it
+        pass
+    data = build()
+    try:
+        os.makedirs(cacheDir(), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cacheDir(), prefix=f".{kind}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump({"signature": signature, "data": data}, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cacheFile)
+        except BaseException:
+            os.remove(tmp)
+            raise
+    except OSError:
+        ## The cache is an optimisation only, e.g. the cache directory may be read-only
+        pass
+    return data
+
+
+def loadDefaults(mesaDir, defaultsDir, sections, defaultsFileNames):
+    """Loads the parsed defaults of all sections, using the on-disk cache where possible.
+
+    Args:
+        mesaDir (str): Path to the MESA directory.
+        defaultsDir (str): Path to the defaults directory.
+        sections (list): A list with the sections of the defaults files.
+        defaultsFileNames (dict): The defaults file name of each section.
+
+    Returns:
+        dict: A dictionary with the parameters and their values for each section.
+    """
+    paths = [os.path.join(defaultsDir, defaultsFileNames[section]) for section in sections]
+    key = (mesaVersion(mesaDir), os.path.abspath(defaultsDir), tuple(sections))
+    def build():
+        return {section: readDefaults(defaultsFileNames[section], defaultsDir) for section in sections}
+    return loadCached("defaults", key, paths, build)
+
+
+def sharedDefaults(astero=False, binary=False, target=''):
+    """Returns the parsed defaults for a project type, shared by all callers in this process.
+
+    Args:
+        astero (bool, optional): If the project is an astero project. Defaults to False.
+        binary (bool, optional): If the project is a binary. Defaults to False.
+        target (str, optional): If the project is a binary, which star or the binary system. Defaults to ''.
+
+    Returns:
+        SharedDefaults: The MESA and defaults directories, the sections, the defaults file names,
+                        a read-only mapping of the defaults of each section and a read-only
+                        parameter index as built by `access_helper.buildDefaultsIndex`.
+    """
+    binary_target = binary and target == 'binary'
+    key = (os.environ.get("MESA_DIR"), bool(astero), bool(binary), binary_target)
+    with _registry_lock:
+        if key in _registry:
+            _registry.move_to_end(key)
+            return _registry[key]
+        envObj = MesaEnvironmentHandler(astero, binary, target)
+        if binary_target:
+            sections, defaultsFileNames = sections_binary, defaultsFileNames_binary
+        elif binary or not astero:
+            sections, defaultsFileNames = sections_star, defaultsFileNames_star
+        else:
+            sections, defaultsFileNames = sections_astero, defaultsFileNames_astero
+        defaults = loadDefaults(envObj.mesaDir, envObj.defaultsDir, sections, defaultsFileNames)
+        defaults = MappingProxyType({section: MappingProxyType(values) for section, values in defaults.items()})
+        index = MappingProxyType(buildDefaultsIndex(defaults, sections))
+        shared = SharedDefaults(envObj.mesaDir, envObj.defaultsDir, tuple(sections),
+                                MappingProxyType(dict(defaultsFileNames)), defaults, index)
+        _registry[key] = shared
+        while len(_registry) > REGISTRY_SIZE:
+            _registry.popitem(last=False)
+        return shared
+
+
+def invalidateDefaults(mesaDir=None):
+    """Drops entries from the defaults registry, so that they are reloaded on next use.
+    The on-disk cache revalidates itself, so it does not need to be invalidated.
+
+    Args:
+        mesaDir (str, optional): Only drop the entries of this MESA directory. Defaults to None, dropping all entries.
+    """
+    with _registry_lock:
+        if mesaDir is None:
+            _registry.clear()
+            _gyre_registry.clear()
+        else:
+            for key in [key for key in _registry if key[0] == mesaDir]:
+                del _registry[key]
+
+
+def gyreDefaultsFiles(gyreDir):
+    """Returns the reference guide files of the GYRE input files, in sorted order.
+
+    Args:
+        gyreDir (str): Path to the GYRE directory.
+
+    Returns:
+        list: Paths to the .rst files.
+    """
+    gyre_defaults_dir = os.path.join(gyreDir, "docs/source/ref-guide/input-files")
+    if not os.path.exists(gyre_defaults_dir):
+        gyre_defaults_dir = os.path.join(gyreDir, "doc/source/ref-guide/input-files")
+    return sorted(glob.glob(os.path.join(gyre_defaults_dir, "*")))
+
+
+def sharedGyreDefaults(gyreDir=None):
+    """Returns the GYRE parameter table, shared by all callers in this process and cached on disk.
+
+    Args:
+        gyreDir (str, optional): Path to the GYRE directory. Defaults to None, using $GYRE_DIR.
+
+    Returns:
+        SharedGyreDefaults: The GYRE directory, a read-only mapping of the parameters of each section
+                            and a read-only {parameter: section} index as built by `access_helper.buildGyreIndex`.
+    """
+    gyreDir = os.path.abspath(gyreDir if gyreDir is not None else os.environ["GYRE_DIR"])
+    with _registry_lock:
+        if gyreDir in _gyre_registry:
+            return _gyre_registry[gyreDir]
+        paths = gyreDefaultsFiles(gyreDir)
+        sections = loadCached("gyre-defaults", (gyreDir,), paths, lambda: readGyreDefaults(paths))
+        shared = SharedGyreDefaults(gyreDir, MappingProxyType({section: tuple(params) for section, params in sections.items()}),
+                                    MappingProxyType(buildGyreIndex(sections)))
+        _gyre_registry[gyreDir] = shared
+        return shared
@@ -20,7 +20,7 @@ class MesaEnvironmentHandler():
             raise FileNotFoundError(f"Defaults directory {self.defaultsDir} does not exist.")
         if astero:
             for filename in glob.glob(os.path.join(self.mesaDir, "star/defaults", "*.defaults")):
-                shutil.copy(filename, self.defaultsDir)
+                self.copyIfChanged(filename, self.defaultsDir)
     
     def copyDefaults(self):
         if not os.path.exists(os.path.join(self.defaultsDir, "kap.defaults")):
@@ -28,6 +28,18 @@ class MesaEnvironmentHandler():
         if not os.path.exists(os.path.join(self.defaultsDir, "eos.defaults")):
             shutil.copy(os.path.join(self.mesaDir, "eos/defaults/eos.defaults"), self.defaultsDir)
 
+    def copyIfChanged(self, filename, destDir):
+        """Copies a file into a directory unless an identical copy is already there.
+        The modification time is preserved, so that the parsed defaults cache stays valid.
+        """
+        dest = os.path.join(destDir, os.path.basename(filename))
+        src_stat = os.stat(filename)
+        if os.path.exists(dest):
+            dest_stat = os.stat(dest)
+            if dest_stat.st_size == src_stat.st_size and dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+                return
+        shutil.copy2(filename, dest)
+
     def readMesaDirs(self, envVar):
         try:
             mesaDir = os.environ[envVar]
@@ -0,0 +1,212 @@
+import os
+import shutil
+import itertools
+
+from .mesa_access import MesaAccess
+from .binary_access import MesaBinaryAccess
+from .access_helper import matchtoDefaults, getFilename, matchTypes, toFortranType, toPythonType, regex_includeName
+from .support.utils import atomicWrite
+
+"""
+This module defines the `InlistGrid` class, which renders the inlists of many projects from one base project.
+
+The inlists of the base project are parsed once and each parameter is checked against the defaults once.
+Every grid point is then rendered in memory from the parsed template and written out in a single write per
+inlist file, streaming through the points, so arbitrarily large grids are rendered in constant memory.
+Relative `extra_*_inlist_name` includes that do not exist in the directory of a grid point, e.g. a base inlist
+shared by the grid, are rewritten relative to that directory.
+
+Attributes:
+    project (str): Path to the base project.
+    binary (bool): True for a binary star system.
+    astero (bool): True for an asteroseismic project.
+
+Methods:
+    product(axes): Returns the Cartesian product of parameter values as a generator of grid points.
+    overrides(point, force=False): Validates a grid point and returns its changes per inlist file.
+    includes(filename, overrides, pointDir): Returns the extra inlist names of an inlist file rewritten for a point directory.
+    iterRender(points, dest, name="{index:05d}", copy_project=False, force=False): Renders the grid points one by one.
+    render(points, dest, name="{index:05d}", copy_project=False, force=False): Renders all grid points.
+"""
+
+class InlistGrid:
+    def __init__(self, project, astero=False, binary=False):
+        """Initializes the InlistGrid class.
+
+        Args:
+            project (str): Path to the base project.
+            astero (bool, optional): If the project is an astero project. Defaults to False.
+            binary (bool, optional): If the project is a binary. Defaults to False.
+        """
+        self.project = project
+        self.astero = astero
+        self.binary = binary
+        if binary:
+            self.access = MesaBinaryAccess(project).access
+        else:
+            self.access = {None: MesaAccess(project, astero=astero)}
+        self.projectDir = self.access[next(iter(self.access))].projectDir
+        ## Parsed once, only rendered afterwards
+        self.templates = {}
+        for access in self.access.values():
+            for filename in access.inlist_filenames:
+                self.templates[filename] = access.document(filename)
+        ## (target, parameter) -> (filename, section, default type)
+        self.parameters = {}
+
+
+    @staticmethod
+    def product(axes):
+        """Returns the Cartesian product of parameter values.
+
+        Args:
+            axes (dict): {parameter: list of values}. For binaries, {target: {parameter: list of values}}.
+
+        Returns:
+            generator: Grid points, each a dict in the same layout as axes, with single values.
+        """
+        if all(isinstance(values, dict) for values in axes.values()) and axes:
+            flat = [(target, parameter, values) for target, params in axes.items() for parameter, values in params.items()]
+            for combination in itertools.product(*[values for _, _, values in flat]):
+                point = {target: {} for target in axes}
+                for (target, parameter, _), value in zip(flat, combination):
+                    point[target][parameter] = value
+                yield point
+        else:
+            parameters = list(axes)
+            for combination in itertools.product(*[axes[parameter] for parameter in parameters]):
+                yield dict(zip(parameters, combination))
+
+
+    def resolve(self, parameter, target=None):
+        """Returns the inlist file, section and default type of a parameter, looking it up only once.
+
+        Args:
+            parameter (str): The parameter.
+            target (str, optional): For binaries, 'binary', 'primary' or 'secondary'. Defaults to None.
+
+        Raises:
+            KeyError: If the parameter does not exist in the defaults files.
+
+        Returns:
+            str, str, type: The inlist file, the section and the default type.
+        """
+        key = (target, parameter)
+        if key not in self.parameters:
+            access = self.access[target]
+            section, _, default_type = matchtoDefaults(parameter, access.defaultsIndex)
+            filename = getFilename(access.astero, access.binary, section, access.inlist_filenames)
+            self.parameters[key] = (filename, section, default_type)
+        return self.parameters[key]
+
+
+    def overrides(self, point, force=False):
+        """Validates a grid point and returns its changes grouped by inlist file and section.
+
+        Args:
+            point (dict): {parameter: value}. For binaries, {target: {parameter: value}}.
+            force (bool, optional): Skip the type check against the defaults. Defaults to False.
+
+        Raises:
+            KeyError: If a parameter does not exist in the defaults files.
+            TypeError: If a value is not of the default type.
+
+        Returns:
+            dict: {filename: {section: {parameter: Fortran value}}}.
+        """
+        if self.binary:
+            items = [(target, parameter, value) for target, params in point.items() for parameter, value in params.items()]
+        else:
+            items = [(None, parameter, value) for parameter, value in point.items()]
+        overrides = {}
+        for target, parameter, value in items:
+            if target not in self.access:
+                raise ValueError(f"Invalid target '{target}'. Use 'binary', 'primary' or 'secondary'.")
+            filename, section, default_type = self.resolve(parameter, target)
+            if hasattr(value, "item"):
+                ## NumPy scalars, e.g. from numpy.linspace
+                value = value.item()
+            if not force and not matchTypes(type(value), default_type):
+                raise TypeError(f"Value {value} of {parameter} is not of default type {default_type}")
+            overrides.setdefault(filename, {}).setdefault(section, {})[parameter] = toFortranType(value)
+        return overrides
+
+
+    def includes(self, filename, overrides, pointDir):
+        """Returns the relative extra inlist names of an inlist file that do not resolve from a grid point directory,
+        rewritten relative to it. MESA resolves them from the directory it runs in, so they are relative to the base project.
+
+        Args:
+            filename (str): The inlist file.
+            overrides (dict): {section: {parameter: Fortran value}} of the grid point for this file.
+            pointDir (str): Directory of the grid point.
+
+        Returns:
+            dict: {section: {parameter: Fortran value}} of the rewritten names.
+        """
+        rewritten = {}
+        for section in self.templates[filename].sections:
+            values = {name: entry.value for name, entry in section.entries.items()}
+            values.update(overrides.get(section.name, {}))
+            for parameter, value in values.items():
+                if regex_includeName.match(parameter) is None:
+                    continue
+                try:
+                    name = toPythonType(value)
+                except (AttributeError, IndexError):
+                    continue
+                if (not isinstance(name, str) or not name or name == "undefined" or os.path.isabs(name)
+                        or os.path.normpath(name) in self.templates or os.path.exists(os.path.join(pointDir, name))):
+                    continue
+                path = os.path.relpath(os.path.join(self.projectDir, name), pointDir)
+                rewritten.setdefault(section.name, {})[parameter] = toFortranType(path)
+        return rewritten
+
+
+    def iterRender(self, points, dest, name="{index:05d}", copy_project=False, force=False):
+        """Renders the inlists of each grid point into its own directory, one point at a time.
+
+        Args:
+            points (iterable): Grid points, e.g. from `product` or a list of dicts.
+            dest (str): Directory in which a directory is created for each grid point.
+            name (str or callable, optional): Name of the directory of each point. Either a format string
+                                              with an {index} field, or a function of (index, point).
+                                              Defaults to "{index:05d}".
+            copy_project (bool, optional): Also copy the rest of the base project (except LOGS, photos and png
+                                           directories) into each directory. Defaults to False.
+            force (bool, optional): Skip the type check against the defaults. Defaults to False.
+
+        Raises:
+            KeyError: If a parameter does not exist in the defaults files.
+            TypeError: If a value is not of the default type.
+
+        Yields:
+            str: Path to the directory of each rendered grid point.
+        """
+        dest = os.path.abspath(dest)
+        ignore = shutil.ignore_patterns("LOGS*", "photos*", "png*", ".mesa_temp_cache", *self.templates)
+        for index, point in enumerate(points):
+            overrides = self.overrides(point, force=force)
+            pointDir = os.path.join(dest, name(index, point) if callable(name) else name.format(index=index))
+            if copy_project:
+                shutil.copytree(self.projectDir, pointDir, ignore=ignore, dirs_exist_ok=True)
+            else:
+                os.makedirs(pointDir, exist_ok=True)
+            for filename, template in self.templates.items():
+                sections = {section: dict(params) for section, params in overrides.get(filename, {}).items()}
+                for section, params in self.includes(filename, sections, pointDir).items():
+                    sections.setdefault(section, {}).update(params)
+                atomicWrite(os.path.join(pointDir, filename), template.render(sections))
+            yield pointDir
+
+
+    def render(self, points, dest, name="{index:05d}", copy_project=False, force=False):
+        """Renders the inlists of all grid points. See `iterRender` for the arguments.
+
+        Returns:
+            int: Number of grid points rendered.
+        """
+        count = 0
+        for _ in self.iterRender(points, dest, name=name, copy_project=copy_project, force=force):
+            count += 1
+        return count
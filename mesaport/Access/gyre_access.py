@@ -1,12 +1,10 @@
-import glob
 import os
 # from . import loader
 import shutil
 from . import access_helper
-from .support.utils import cwd
-
-from threading import Lock
-file_operation_lock = Lock()
+from .cache import sharedGyreDefaults
+from .namelist import readShared
+from .support.utils import atomicWrite
 
 """
 This module defines the `GyreAccess` class, which handles GYRE input file operations.
@@ -20,6 +18,9 @@ Methods:
     load(gyre_in="gyre.in"): Loads the GYRE input file into the project directory.
     set(arg, gyre_in="gyre.in"): Sets the value of a parameter in the inlist file.
     modify_gyre_params(wdir, filename, data_format, gyre_in="gyre.in", diff_scheme='MAGNUS_GL2'): Modifies the GYRE input file parameters.
+    overrides(filename, data_format, gyre_input_params=None, write_detail_output=False): Returns the changes of a profile's GYRE input file.
+    render(gyre_in, filename, data_format, gyre_input_params=None, write_detail_output=False): Renders a profile's GYRE input file.
+    writeGyreIn(gyre_in, dest, filename, data_format, gyre_input_params=None, write_detail_output=False): Writes a profile's GYRE input file.
 """
 
 class GyreAccess:
@@ -31,7 +32,10 @@ class GyreAccess:
             target (str): The target to be used.
         """
         self.check_env()
-        self.default_sections = self.gyreDefaults()
+        ## Shared with all other instances, must not be modified
+        shared = sharedGyreDefaults()
+        self.default_sections = shared.sections
+        self.defaultsIndex = shared.index
 
     def check_env(self):
         """
@@ -49,35 +53,13 @@ class GyreAccess:
         shutil.copy(gyre_in, os.path.join(dest, 'gyre.in'))
         
     def gyreDefaults(self):
-        """Reads the defaults files and returns a dictionary with all the parameters and their values.
+        """Returns the parameters of each section of the GYRE input files.
+        The table is parsed from the GYRE reference guide once per GYRE installation and cached on disk.
+
         Returns:
-            dict: A dictionary with all the parameters and their values.
+            dict: A dictionary with the parameters of each section.
         """    
-        gyre_dir = os.path.abspath(os.environ["GYRE_DIR"])
-        gyre_defaults_dir = os.path.join(gyre_dir, "docs/source/ref-guide/input-files")
-        if not os.path.exists(gyre_defaults_dir):
-            gyre_defaults_dir = os.path.join(gyre_dir, "doc/source/ref-guide/input-files")
-        gyre_defaults_dir = os.path.join(gyre_defaults_dir, "*")
-        defaultsFiles = glob.glob(gyre_defaults_dir)
-        # sections = ["&"+name.split("/")[-1].split('.')[0].split('-')[0] for name in defaultsFiles]
-        # print(sections)
-        section_parameters = {}
-        for i, file in enumerate(defaultsFiles):
-            params = []
-            sections = []
-            with open(file) as file:
-                for line in file:
-                    if ":nml_g:" in line:
-                        splits = line.split(":nml_g:")
-                        for s in splits:
-                            if "`" in s:
-                                sections.append("&"+s.split("`")[1])
-                    if ":nml_n:" in line:
-                        params.append(line.split(":nml_n:")[1].split("`")[1])
-            sections = list(set(sections))
-            for section in sections:
-                section_parameters[section] = params
-        return section_parameters
+        return dict(sharedGyreDefaults().sections)
 
 
     def writetoGyreFile(self, wdir, parameter, value, default_section=None, gyre_in="gyre.in"):
@@ -91,54 +73,135 @@ class GyreAccess:
             sections (list): A list with the sections of the inlist file.
         """   
         if default_section is None:
-            for section, values in self.default_sections.items():
-                if parameter in values:
-                    default_section = section
+            default_section = self.defaultsIndex.get(parameter)
             if default_section is None:
                 raise TypeError(f"Parameter {parameter} not found in any GYRE input files.")
         this_section = False
-        with cwd(wdir):
-            with file_operation_lock:
-                with open(gyre_in, "r") as file:
-                    lines = file.readlines()
-                with open(gyre_in, "w+") as f:
-                    indent = "    "
-                    for line in lines:
-                        edited = False
-                        if default_section in line:
-                            this_section = True
-                        if this_section:
-                            if parameter in line:
-                                if parameter == line.split("=")[0].strip():
-                                    f.write(line.replace(line.split("=")[1], f" {value}    ! Changed\n"))
-                                    edited = True
-                                    this_section = False
-                            elif line[0] == "/":
-                                f.write(indent)
-                                f.write(f"{parameter} = {value}    ! Added\n")
-                                f.write("/")
-                                edited = True
-                                this_section = False
-                        if not edited:
-                            f.write(line)
+        path = os.path.join(wdir, gyre_in)
+        with open(path, "r") as file:
+            lines = file.readlines()
+        out = []
+        indent = "    "
+        for line in lines:
+            edited = False
+            if default_section in line:
+                this_section = True
+            if this_section:
+                if parameter in line:
+                    if parameter == line.split("=")[0].strip():
+                        out.append(line.replace(line.split("=")[1], f" {value}    ! Changed\n"))
+                        edited = True
+                        this_section = False
+                elif line[0] == "/":
+                    out.append(indent)
+                    out.append(f"{parameter} = {value}    ! Added\n")
+                    out.append("/")
+                    edited = True
+                    this_section = False
+            if not edited:
+                out.append(line)
+        atomicWrite(path, "".join(out))
 
    
 
-    def modify_gyre_params(self, wdir, filename, data_format, gyre_in="gyre.in", diff_scheme='MAGNUS_GL2', write_detail_output=False):
+    def profileParams(self, filename, data_format, write_detail_output=False):
+        """Returns the parameters that point GYRE to a profile file and its output files.
+
+        Args:
+            filename (str): The profile file.
+            data_format (str): The data format of the profile file, "GYRE", "FGONG" or other.
+            write_detail_output (bool, optional): Also set the detail output templates. Defaults to False.
+
+        Returns:
+            list: (section, parameter, value) tuples, with Fortran values.
+        """
         if data_format == "GYRE":
             file_format = "MESA"
         elif data_format == "FGONG":
             file_format = "FGONG"
         else:
             file_format = "GSM"
-        self.writetoGyreFile(wdir, parameter="model_type", value="'EVOL'", default_section="&model", gyre_in=gyre_in)
-        self.writetoGyreFile(wdir, parameter="file_format", value=f"'{file_format}'", default_section="&model", gyre_in=gyre_in)
-        self.writetoGyreFile(wdir, parameter="file", value=f"'{filename}'", default_section="&model", gyre_in=gyre_in)
-        self.writetoGyreFile(wdir, parameter="summary_file", value=f"'{filename.split('.')[0]}-freqs.dat'", default_section="&ad_output", gyre_in=gyre_in)
-        self.writetoGyreFile(wdir, parameter="summary_file", value=f"'{filename.split('.')[0]}-freqs-nad.dat'", default_section="&nad_output", gyre_in=gyre_in)
+        stem = filename.split('.')[0]
+        params = [("&model", "model_type", "'EVOL'"),
+                  ("&model", "file_format", f"'{file_format}'"),
+                  ("&model", "file", f"'{filename}'"),
+                  ("&ad_output", "summary_file", f"'{stem}-freqs.dat'"),
+                  ("&nad_output", "summary_file", f"'{stem}-freqs-nad.dat'")]
         if write_detail_output:
-            self.writetoGyreFile(wdir, parameter="detail_template", value=f"'{filename.split('.')[0]}ad_n%n_l%l_m%m_p%p_g%g.dat'", default_section="&ad_output", gyre_in=gyre_in)
-            self.writetoGyreFile(wdir, parameter="detail_template", value=f"'{filename.split('.')[0]}nad_n%n_l%l_m%m_p%p_g%g.dat'", default_section="&nad_output", gyre_in=gyre_in)
+            params.append(("&ad_output", "detail_template", f"'{stem}ad_n%n_l%l_m%m_p%p_g%g.dat'"))
+            params.append(("&nad_output", "detail_template", f"'{stem}nad_n%n_l%l_m%m_p%p_g%g.dat'"))
+        return params
+
+
+    def modify_gyre_params(self, wdir, filename, data_format, gyre_in="gyre.in", diff_scheme='MAGNUS_GL2', write_detail_output=False):
+        for section, parameter, value in self.profileParams(filename, data_format, write_detail_output):
+            self.writetoGyreFile(wdir, parameter=parameter, value=value, default_section=section, gyre_in=gyre_in)
+
+
+    def overrides(self, filename, data_format, gyre_input_params=None, write_detail_output=False):
+        """Returns all changes of a profile's GYRE input file: the profile parameters set by `modify_gyre_params`
+        followed by the user parameters set by `set`.
+
+        Args:
+            filename (str): The profile file.
+            data_format (str): The data format of the profile file.
+            gyre_input_params (dict or list of dicts, optional): The user parameters. Defaults to None.
+            write_detail_output (bool, optional): Also set the detail output templates. Defaults to False.
+
+        Raises:
+            TypeError: If a parameter is not found in any GYRE input files, or the parameters are not dicts.
+
+        Returns:
+            dict: {section: {parameter: Fortran value}}, with section names without the '&'.
+        """
+        if isinstance(gyre_input_params, dict):
+            gyre_input_params = [gyre_input_params]
+        elif gyre_input_params is None:
+            gyre_input_params = []
+        elif not isinstance(gyre_input_params, list):
+            raise TypeError("Argument must be a dictionary or a list of dictionaries.")
+        overrides = {}
+        for section, parameter, value in self.profileParams(filename, data_format, write_detail_output):
+            overrides.setdefault(section[1:], {})[parameter] = value
+        for item in gyre_input_params:
+            for parameter, value in item.items():
+                section = self.defaultsIndex.get(parameter)
+                if section is None:
+                    raise TypeError(f"Parameter {parameter} not found in any GYRE input files.")
+                overrides.setdefault(section[1:], {})[parameter] = access_helper.toFortranType(value)
+        return overrides
+
+
+    def render(self, gyre_in, filename, data_format, gyre_input_params=None, write_detail_output=False):
+        """Renders a profile's GYRE input file from a template in memory, with the same result as
+        copying the template and calling `modify_gyre_params` and `set` on the copy.
+        The template is parsed once per process and only parsed again if it changes on disk.
+
+        Args:
+            gyre_in (str): Path to the template GYRE input file.
+            filename (str): The profile file.
+            data_format (str): The data format of the profile file.
+            gyre_input_params (dict or list of dicts, optional): The user parameters. Defaults to None.
+            write_detail_output (bool, optional): Also set the detail output templates. Defaults to False.
+
+        Returns:
+            str: The text of the GYRE input file.
+        """
+        template = readShared(gyre_in)
+        overrides = self.overrides(filename, data_format, gyre_input_params, write_detail_output)
+        ## Sections missing from the template are not added, e.g. &nad_output would switch on non-adiabatic runs
+        overrides = {section: values for section, values in overrides.items() if template.section(section) is not None}
+        return template.render(overrides, allSections=True)
+
+
+    def writeGyreIn(self, gyre_in, dest, filename, data_format, gyre_input_params=None, write_detail_output=False):
+        """Renders a profile's GYRE input file (see `render`) and writes it to dest in a single write.
+
+        Args:
+            gyre_in (str): Path to the template GYRE input file.
+            dest (str): Path of the GYRE input file to write.
+        """
+        atomicWrite(dest, self.render(gyre_in, filename, data_format, gyre_input_params, write_detail_output))
 
 
     def set(self, arg, wdir, gyre_in="gyre.in"):
@@ -1,7 +1,9 @@
 from .support import *
-from .envhandler import MesaEnvironmentHandler
 from .access_helper import *
 from . import loader
+from contextlib import contextmanager
+from .cache import sharedDefaults
+from .namelist import NamelistDocument, readShared
 
 """
 This module defines the `MesaAccess` class, which handles MESA project access.
@@ -14,10 +16,13 @@ Attributes:
 
 Methods:
     set(key, value, default=False, force=False): Sets a value in the full dictionary.
-    get(key): Gets a value from the full dictionary.
+    get(key): Gets a value from the full dictionary, resolving the extra inlists MESA reads.
+    getSource(key): Gets the inlist file a value is read from.
     delete(key): Deletes a value from the full dictionary.
     setDefault(keys): Sets all values to default.
     getDefault(keys): Gets default value from the full dictionary.
+    batch(): Context manager that keeps all changes made inside it in memory and writes them on exit.
+    flush(): Writes all changed inlist files to disk.
     load_InlistProject(inlistPath): Loads the inlist file.
     load_InlistAsteroSearch(inlistPath): Loads the astero_search_controls inlist file.
     load_InlistPG(inlistPath): Loads the inlist file.
@@ -26,6 +31,9 @@ Methods:
     load_Extras(extras_path): Loads the run_star_extras file.
 """
 
+## MESA refuses to read extra inlists nested deeper than this
+MAX_INCLUDE_DEPTH = 10
+
 class MesaAccess:
     def __init__(self, project, astero=False, binary=False, target=''):
         """Initializes the MesaAccess class.
@@ -45,41 +53,147 @@ class MesaAccess:
             self.projectDir = project
         else:
             self.projectDir = os.path.join(os.getcwd(), project)
-        envObj = MesaEnvironmentHandler(astero, binary, target)
+        shared = sharedDefaults(astero, binary, target)
+        self.mesaDir, self.defaultsDir = shared.mesaDir, shared.defaultsDir
+        self.sections, self.defaultsFileNames = shared.sections, shared.defaultsFileNames
         if binary and target == 'binary':
-            self.mesaDir, self.defaultsDir = envObj.mesaDir, envObj.defaultsDir
-            self.sections, self.defaultsFileNames = sections_binary, defaultsFileNames_binary
             self.inlist_filenames = ["inlist_project"]
         elif binary and target != 'binary':
-            self.mesaDir, self.defaultsDir = envObj.mesaDir, envObj.defaultsDir
-            self.sections, self.defaultsFileNames = sections_star, defaultsFileNames_star
             if self.target == 'primary':
                 self.inlist_filenames = ["inlist1"]
             elif self.target == 'secondary':
                 self.inlist_filenames = ["inlist2"]
         elif astero:
-            self.mesaDir, self.defaultsDir = envObj.mesaDir, envObj.defaultsDir
-            self.sections, self.defaultsFileNames = sections_astero, defaultsFileNames_astero
             self.inlist_filenames = ["inlist_project", "inlist_pgstar", "inlist_astero_search_controls"]
         else:
-            self.mesaDir, self.defaultsDir = envObj.mesaDir, envObj.defaultsDir
-            self.sections, self.defaultsFileNames = sections_star, defaultsFileNames_star
             self.inlist_filenames = ["inlist_project", "inlist_pgstar"]
-        self.defaultsDict = {}
-        for section in self.sections:
-            self.defaultsDict[section] = readDefaults(self.defaultsFileNames[section], self.defaultsDir)
+        ## Shared with all other instances of the same project type, must not be modified
+        self.defaultsDict = shared.defaults
+        self.defaultsIndex = shared.index
+        ## Parsed inlist documents, read once and written back by flush()
+        self.documents = {}
+        self.batchDepth = 0
+        ## (section, filename) -> [(path, document)] in MESA read order, rebuilt by generateDicts()
+        self.chains = {}
         
         
-    def generateDicts(self):
-        """Generates the dictionaries for the inlist files.
+    def document(self, filename, reload=False):
+        """Returns the parsed document of an inlist file.
+        The file is only read again if its mtime, size or inode changed since it was last read or written.
+        A document with unwritten changes is never re-read.
+
+        Args:
+            filename (str): Name of the inlist file.
+            reload (bool, optional): Read the file again even if it did not change. Defaults to False.
+
+        Raises:
+            FileNotFoundError: If the inlist file does not exist.
+
+        Returns:
+            NamelistDocument: The parsed inlist.
+        """
+        document = self.documents.get(filename)
+        if document is None or (not document.dirty and (reload or document.isStale())):
+            path = os.path.join(self.projectDir, filename)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Inlist {filename} does not exist.")
+            document = self.documents[filename] = NamelistDocument.read(path)
+        return document
+
+
+    def generateDicts(self, reload=False):
+        """Reads the inlist files that are not read yet or changed on disk.
+
+        Args:
+            reload (bool, optional): Read all inlist files again, even if they did not change. Defaults to False.
         """        
-        self.inlistDict = {}
-        self.inlistSections = {}
         for filename in self.inlist_filenames:
-            self.inlistSections[filename], self.inlistDict[filename] = readFile(filename, self.projectDir)
+            self.document(filename, reload=reload)
+        self.chains.clear()
         # pprint(self.inlistDict)
 
 
+    def includedDocument(self, path):
+        """Returns the parsed document of a file in an include chain.
+        The inlist files of the project are read through `document`, so that unwritten changes are seen.
+        All other files, e.g. base inlists shared by many projects, come from the process-wide cache.
+        """
+        if os.path.dirname(path) == os.path.normpath(self.projectDir) and os.path.basename(path) in self.inlist_filenames:
+            return self.document(os.path.basename(path))
+        return readShared(path)
+
+
+    def followIncludes(self, section, path, chain, level=1):
+        """Appends a file and, recursively, the extra inlists it includes for a section to the chain.
+
+        Raises:
+            FileNotFoundError: If an included inlist does not exist.
+            ValueError: If the extra inlists are nested deeper than MESA allows.
+        """
+        if level > MAX_INCLUDE_DEPTH:
+            raise ValueError(f"Extra {section} inlists nested more than {MAX_INCLUDE_DEPTH} levels deep at {path}")
+        document = self.includedDocument(path)
+        chain.append((path, document))
+        section_ = document.section(section)
+        if section_ is not None:
+            values = {name: entry.value for name, entry in section_.entries.items()}
+            for name in includedFiles(section, values):
+                self.followIncludes(section, os.path.normpath(os.path.join(self.projectDir, name)), chain, level + 1)
+
+
+    def readOrder(self, section, filename):
+        """Returns the files MESA reads a namelist section from, in read order, as MESA resolves them:
+        after reading a file, the extra inlists flagged in that file are read, each overriding what was read before.
+        The chain starts at the top level `inlist` of the project if that includes the inlist file, else at the inlist file.
+
+        Args:
+            section (str): The namelist section.
+            filename (str): The inlist file the section is written to.
+
+        Returns:
+            list: (path, NamelistDocument) pairs in read order.
+        """
+        key = (section, filename)
+        if key not in self.chains:
+            path = os.path.normpath(os.path.join(self.projectDir, filename))
+            chain = []
+            top = os.path.normpath(os.path.join(self.projectDir, "inlist"))
+            if not (self.binary and self.target != 'binary') and path != top and os.path.exists(top):
+                self.followIncludes(section, top, chain)
+            if path not in [path_ for path_, _ in chain]:
+                chain = []
+                self.followIncludes(section, path, chain)
+            self.chains[key] = chain
+        return self.chains[key]
+
+
+    def resolve(self, item):
+        """Returns the resolved Fortran value of a parameter and the file it is read from.
+
+        Returns:
+            str, str: The value and the path of the file, both None if the parameter is not set in any file.
+        """
+        default_section, default_val, default_type = matchtoDefaults(item, self.defaultsIndex)
+        filename = getFilename(self.astero, self.binary, default_section, self.inlist_filenames)
+        value, source = None, None
+        for path, document in self.readOrder(default_section, filename):
+            found = document.get(default_section, item)
+            if found is not None:
+                value, source = found, path
+        return value, source
+
+
+    @property
+    def inlistDict(self):
+        """A {filename: {section: {parameter: value}}} view of the inlist files."""
+        return {filename: self.document(filename).toDicts()[1] for filename in self.inlist_filenames}
+
+
+    @property
+    def inlistSections(self):
+        """A {filename: [sections]} view of the inlist files."""
+        return {filename: self.document(filename).sectionNames() for filename in self.inlist_filenames}
+
     
     def setitem(self, key, value, default=False, force=False):
         """Sets a value in the full dictionary.
@@ -91,20 +205,20 @@ class MesaAccess:
         Raises:
             TypeError: Value is not of default type
         """        
-        default_section, default_val, default_type = matchtoDefaults(key, self.defaultsDict, self.sections)
+        default_section, default_val, default_type = matchtoDefaults(key, self.defaultsIndex)
         if default:
             value = default_val
         filename = getFilename(self.astero, self.binary, default_section, self.inlist_filenames)
-        exists, _ = matchtoFile(key, self.inlistDict[filename], self.inlistSections[filename], default_section)
         if not force:
             if not matchTypes(type(value), default_type):
                 raise TypeError(f"Value {value} is not of default type {default_type}")
-        writetoFile(self.projectDir, filename, key, value, exists, default_section, delete=False)
+        self.document(filename).set(default_section, key, toFortranType(value))
+        self.chains.clear()
             
 
 
     def getitem(self, item):
-        """Gets a value from the full dictionary.
+        """Gets a value from the full dictionary, as MESA reads it after all extra inlists.
 
         Args:
             item (str): Key of the value to get.
@@ -112,9 +226,8 @@ class MesaAccess:
         Returns:
             str: Value of the key
         """        
-        default_section, default_val, default_type = matchtoDefaults(item, self.defaultsDict, self.sections)
-        filename = getFilename(self.astero, self.binary, default_section, self.inlist_filenames)
-        return matchtoFile(item, self.inlistDict[filename], self.inlistSections[filename], default_section)[1]
+        value, source = self.resolve(item)
+        return toPythonType(value) if value is not None else None
     
 
 
@@ -127,14 +240,45 @@ class MesaAccess:
         Raises:
             KeyError: Parameter does not exist in inlist file
         """        
-        default_section, default_val, default_type = matchtoDefaults(key, self.defaultsDict, self.sections)
+        default_section, default_val, default_type = matchtoDefaults(key, self.defaultsIndex)
         filename = getFilename(self.astero, self.binary, default_section, self.inlist_filenames)
-        exists, _ = matchtoFile(key, self.inlistDict[filename], self.inlistSections[filename], default_section)
-        if exists:
-            writetoFile(self.projectDir, filename, key, _, exists, default_section, delete=True)
+        document = self.document(filename)
+        if document.get(default_section, key) is not None:
+            document.delete(default_section, key)
+            self.chains.clear()
         else:
             raise KeyError(f"Parameter {key} does not exist in {filename}")
 
+
+    def flush(self):
+        """Writes all changed inlist files to disk, each in a single write.
+        """
+        for document in self.documents.values():
+            document.flush()
+
+
+    @contextmanager
+    def batch(self):
+        """Keeps all changes made inside the `with` block in memory and writes them on exit,
+        with a single write per inlist file.
+        If the block raises an exception, the changes are discarded and nothing is written.
+        """
+        self.batchDepth += 1
+        try:
+            yield
+        except BaseException:
+            if self.batchDepth == 1:
+                ## Drop the changed documents, they are read again on next use
+                for filename in [filename for filename, document in self.documents.items() if document.dirty]:
+                    del self.documents[filename]
+                self.chains.clear()
+            raise
+        else:
+            if self.batchDepth == 1:
+                self.flush()
+        finally:
+            self.batchDepth -= 1
+
     def set(self, *arg, force=False):
         """Sets a value in the full dictionary.
 
@@ -145,38 +289,40 @@ class MesaAccess:
             TypeError: Input parameter name(s) must be of type string or list of strings.
         """    
         self.generateDicts() 
-        if len(arg) == 1:
-            if isinstance(arg[0], dict):
-                for key, value in arg[0].items():
-                    self.setitem(key, value, force=force)
-            elif isinstance(arg[0], list):
-                for dict_ in arg[0]:
-                    for key, value in dict_.items():
+        with self.batch():
+            if len(arg) == 1:
+                if isinstance(arg[0], dict):
+                    for key, value in arg[0].items():
                         self.setitem(key, value, force=force)
-            else:
-                raise TypeError("Input parameter name(s) must be of type dict or list of dicts.")
-        elif len(arg) == 2:
-            keys, values = arg[0], arg[1]  
-            if isinstance(keys, list):
-                if len(keys) == len(values):
-                    for i in range(len(keys)):
-                        self.setitem(keys[i], values[i], force=force)
+                elif isinstance(arg[0], list):
+                    for dict_ in arg[0]:
+                        for key, value in dict_.items():
+                            self.setitem(key, value, force=force)
                 else:
-                    raise ValueError(f"Length of keys {keys} does not match length of {values}")
-            elif isinstance(keys, str):
-                self.setitem(keys, values, force=force)
-            else:
-                raise TypeError("Input parameter name(s) must be of type string or list of strings.")
+                    raise TypeError("Input parameter name(s) must be of type dict or list of dicts.")
+            elif len(arg) == 2:
+                keys, values = arg[0], arg[1]  
+                if isinstance(keys, list):
+                    if len(keys) == len(values):
+                        for i in range(len(keys)):
+                            self.setitem(keys[i], values[i], force=force)
+                    else:
+                        raise ValueError(f"Length of keys {keys} does not match length of {values}")
+                elif isinstance(keys, str):
+                    self.setitem(keys, values, force=force)
+                else:
+                    raise TypeError("Input parameter name(s) must be of type string or list of strings.")
     
     def setDefault(self, keys):
         """Sets all values to default.
         """        
         self.generateDicts()
-        if isinstance(keys, list):
-            for key in keys:
-                self.setitem(key, '', default=True)
-        elif isinstance(keys, str):
-            self.setitem(keys, '', default=True)
+        with self.batch():
+            if isinstance(keys, list):
+                for key in keys:
+                    self.setitem(key, '', default=True)
+            elif isinstance(keys, str):
+                self.setitem(keys, '', default=True)
 
 
     def getDefault(self, keys):
@@ -195,11 +341,11 @@ class MesaAccess:
         if isinstance(keys, list):
             got = []
             for key in keys:
-                default_section, default_val, default_type = matchtoDefaults(key, self.defaultsDict, self.sections)
+                default_section, default_val, default_type = matchtoDefaults(key, self.defaultsIndex)
                 got.append(default_val)
             return got
         elif isinstance(keys, str):
-            default_section, default_val, default_type = matchtoDefaults(keys, self.defaultsDict, self.sections)
+            default_section, default_val, default_type = matchtoDefaults(keys, self.defaultsIndex)
             return default_val
         else:
             raise TypeError("Input parameter name(s) must be of type string or list of strings.")
@@ -229,7 +375,29 @@ class MesaAccess:
             return self.getitem(items)
         else:
             raise TypeError("Input parameter name(s) must be of type string or list of strings.")
-        
+
+
+    def getSource(self, items):
+        """Gets the inlist file a value is read from, after resolving the extra inlists.
+
+        Args:
+            items (str or list): Key of the value.
+
+        Raises:
+            TypeError: Input parameter name(s) must be of type string or list of strings.
+
+        Returns:
+            str or list: Path of the file (None if the value is not set in any file, i.e. the default is used)
+                         or list of paths.
+        """
+        self.generateDicts()
+        if isinstance(items, list):
+            return [self.resolve(item)[1] for item in items]
+        elif isinstance(items, str):
+            return self.resolve(items)[1]
+        else:
+            raise TypeError("Input parameter name(s) must be of type string or list of strings.")
+
 
 
     def delete(self, keys):
@@ -242,13 +410,14 @@ class MesaAccess:
             TypeError: Input parameter name(s) must be of type string or list of strings.
         """       
         self.generateDicts() 
-        if isinstance(keys, list):
-            for key in keys:
-                self.delitem(key)
-        elif isinstance(keys, str):
-            self.delitem(keys)
-        else:
-            raise TypeError("Input parameter name(s) must be of type string or list of strings.")
+        with self.batch():
+            if isinstance(keys, list):
+                for key in keys:
+                    self.delitem(key)
+            elif isinstance(keys, str):
+                self.delitem(keys)
+            else:
+                raise TypeError("Input parameter name(s) must be of type string or list of strings.")
 
 
     def check_exists(self):
@@ -272,6 +441,8 @@ class MesaAccess:
         """        
         self.check_exists()
         loader.load(inlistPath, self.projectDir, "inlist_project", binary=self.binary, target=self.target)
+        self.documents.clear()
+        self.chains.clear()
 
     def load_InlistAsteroSearch(self, inlistPath):
         """Loads the astero_search_controls inlist file.
@@ -281,6 +452,8 @@ class MesaAccess:
         """        
         self.check_exists()
         loader.load(inlistPath, self.projectDir, "inlist_astero_search_controls")
+        self.documents.clear()
+        self.chains.clear()
             
     
     def load_InlistPG(self, inlistPath):
@@ -294,6 +467,8 @@ class MesaAccess:
         """        
         self.check_exists()
         loader.load(inlistPath, self.projectDir, "inlist_pgstar")
+        self.documents.clear()
+        self.chains.clear()
         
 
     def load_HistoryColumns(self, HistoryColumns):
@@ -0,0 +1,369 @@
+import os
+from threading import Lock
+
+from .support.utils import atomicWrite
+
+"""
+This module defines the `NamelistDocument` class, an in-memory model of a Fortran namelist file
+such as a MESA inlist or a GYRE input file.
+
+The file is parsed once into sections and entries. Comments, blank lines and the order of the
+entries are kept, so that the file can be written back in a single pass with only the changed
+entries touched. Changed, added and removed entries are marked with `! Changed`, `! Added` and
+`! Removed` comments.
+
+Classes:
+    NamelistEntry: A `name = value` line of a namelist section.
+    NamelistSection: A `&name ... /` group of a namelist file.
+    NamelistDocument: A parsed namelist file.
+
+Methods:
+    readShared(path): Returns a read-only parsed namelist file from a process-wide cache.
+"""
+
+## Process-wide cache of read-only documents, e.g. base inlists shared by many projects
+_shared = {}
+_shared_lock = Lock()
+
+
+def fileSignature(path):
+    """Returns the (mtime, size, inode) of a file, used to detect changes on disk.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        tuple: The signature of the file, or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def splitComment(text):
+    """Splits a line into its content and its trailing comment, ignoring '!' inside quoted strings.
+
+    Args:
+        text (str): The line to split.
+
+    Returns:
+        str, str: The content and the comment (without the leading '!'). The comment is None if there is none.
+    """
+    quote = None
+    for i, char in enumerate(text):
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "!":
+            return text[:i], text[i+1:]
+    return text, None
+
+
+class NamelistEntry:
+    """A `name = value` line of a namelist section.
+
+    Attributes:
+        name (str): Parameter name, with whitespace removed.
+        value (str): Fortran literal of the value.
+        comment (str): Trailing comment of the line, or None.
+        status (str): None if unchanged, else 'Changed', 'Added' or 'Removed'.
+    """
+    def __init__(self, name, value, line=None, indent="    ", comment=None):
+        self.name = name
+        self.value = value
+        self.line = line
+        self.indent = indent
+        self.comment = comment
+        self.status = None if line is not None else "Added"
+
+    @classmethod
+    def parse(cls, line):
+        """Parses a namelist line into an entry. Returns None if the line is not an assignment."""
+        content, comment = splitComment(line)
+        if "=" not in content:
+            return None
+        name, _, value = content.partition("=")
+        if comment is not None:
+            comment = comment.strip()
+            for marker in ("Changed", "Added"):
+                if comment.startswith(marker):
+                    comment = comment[len(marker):].lstrip(" !")
+            comment = comment or None
+        indent = line[:len(line) - len(line.lstrip())]
+        return cls(name.replace(" ", ""), value.strip(), line=line, indent=indent, comment=comment)
+
+    def render(self, value=None):
+        """Returns the line(s) of the entry as they are written to the file.
+
+        Args:
+            value (str, optional): Render the entry with this value instead, without changing it. Defaults to None.
+        """
+        status = self.status
+        if value is None:
+            value = self.value
+        elif status is None:
+            status = "Changed"
+        if status is None:
+            return self.line
+        elif status == "Removed":
+            return f"{self.indent}! {self.name} = {value}    ! Removed\n"
+        else:
+            comment = f" ! {self.comment}" if self.comment else ""
+            return f"{self.indent}{self.name} = {value}    ! {status}{comment}\n"
+
+
+class NamelistSection:
+    """A `&name ... /` group of a namelist file.
+
+    Attributes:
+        name (str): Name of the group, without the '&'.
+        lines (list): Entries and raw lines (comments, blank lines) of the group, in file order.
+        entries (dict): The effective entry of each parameter, i.e. the last assignment in the group.
+    """
+    def __init__(self, name, header=None, footer="/\n"):
+        self.name = name
+        self.header = header if header is not None else f"&{name}\n"
+        self.footer = footer
+        self.lines = []
+        self.entries = {}
+        self.inline_footer = False
+
+    def add(self, entry):
+        self.lines.append(entry)
+        self.entries[entry.name] = entry
+
+    def render(self, overrides=None):
+        """Returns the text of the section.
+
+        Args:
+            overrides (dict, optional): {parameter: value} to render instead of the current values,
+                                        without changing the section. Defaults to None.
+        """
+        overrides = overrides or {}
+        added = [name for name in overrides if name not in self.entries]
+        if self.inline_footer and (added or any(isinstance(line, NamelistEntry) for line in self.lines)):
+            text = [f"&{self.name}\n"]
+            footer = "/\n"
+        else:
+            text = [self.header]
+            footer = self.footer
+        for line in self.lines:
+            if isinstance(line, NamelistEntry):
+                if line.name in overrides and self.entries.get(line.name) is line:
+                    text.append(line.render(overrides[line.name]))
+                else:
+                    text.append(line.render())
+            else:
+                text.append(line)
+        for name in added:
+            text.append(NamelistEntry(name, overrides[name]).render())
+        if footer is not None:
+            text.append(footer)
+        return "".join(text)
+
+
+class NamelistDocument:
+    """A parsed namelist file.
+
+    Sections may appear more than once (as in GYRE input files); lookups by name use the first occurrence.
+
+    Attributes:
+        path (str): Path of the file the document is read from and written to.
+        items (list): Sections and raw lines outside of sections, in file order.
+        sections (list): The sections, in file order.
+        dirty (bool): True if the document has changes that are not written yet.
+        signature (tuple): `fileSignature` of the file when it was last read or written.
+    """
+    def __init__(self, text="", path=None):
+        self.path = path
+        self.signature = None
+        self.items = []
+        self.sections = []
+        self.sectionIndex = {}
+        self.dirty = False
+        self.parse(text)
+
+    @classmethod
+    def read(cls, path):
+        """Reads and parses a namelist file.
+
+        Args:
+            path (str): Path to the namelist file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+
+        Returns:
+            NamelistDocument: The parsed document.
+        """
+        signature = fileSignature(path)
+        if signature is None:
+            raise FileNotFoundError(f"Inlist {path} does not exist.")
+        with open(path) as file:
+            document = cls(file.read(), path)
+        document.signature = signature
+        return document
+
+    def isStale(self):
+        """Returns True if the file on disk changed since the document was read or written."""
+        return self.path is not None and fileSignature(self.path) != self.signature
+
+    def parse(self, text):
+        section = None
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            if section is None:
+                if stripped.startswith("&"):
+                    content, _ = splitComment(stripped[1:])
+                    name = content.split("/")[0].split()[0] if content.split("/")[0].split() else ""
+                    section = self.appendSection(NamelistSection(name, header=line, footer=None))
+                    if "/" in content:
+                        section.inline_footer = True
+                        section = None
+                else:
+                    self.items.append(line)
+            elif stripped.startswith("/"):
+                section.footer = line
+                section = None
+            elif stripped.startswith("!") or stripped == "":
+                section.lines.append(line)
+            else:
+                entry = NamelistEntry.parse(line)
+                if entry is None:
+                    section.lines.append(line)
+                else:
+                    section.add(entry)
+
+    def appendSection(self, section):
+        self.items.append(section)
+        self.sections.append(section)
+        self.sectionIndex.setdefault(section.name, section)
+        return section
+
+    def section(self, name):
+        """Returns the first section with the given name, or None."""
+        return self.sectionIndex.get(name)
+
+    def sectionNames(self):
+        """Returns the names of the sections, in file order."""
+        return [section.name for section in self.sections]
+
+    def get(self, section, name):
+        """Returns the Fortran literal of a parameter, or None if it is not set in the section."""
+        section_ = self.sectionIndex.get(section)
+        if section_ is None:
+            return None
+        entry = section_.entries.get(name)
+        return entry.value if entry is not None else None
+
+    def set(self, section, name, value):
+        """Sets a parameter to a Fortran literal, adding it (and the section) if needed."""
+        section_ = self.sectionIndex.get(section)
+        if section_ is None:
+            last = self.items[-1] if self.items else None
+            if isinstance(last, NamelistSection) and last.footer and not last.footer.endswith("\n"):
+                last.footer += "\n"
+            elif isinstance(last, str) and not last.endswith("\n"):
+                self.items[-1] = last + "\n"
+            self.items.append("\n")
+            section_ = self.appendSection(NamelistSection(section))
+        entry = section_.entries.get(name)
+        if entry is None:
+            section_.add(NamelistEntry(name, value))
+        else:
+            entry.value = value
+            if entry.status is None:
+                entry.status = "Changed"
+        self.dirty = True
+
+    def delete(self, section, name):
+        """Comments out a parameter.
+
+        Raises:
+            KeyError: If the parameter is not set in the section.
+        """
+        section_ = self.sectionIndex.get(section)
+        entry = section_.entries.pop(name, None) if section_ is not None else None
+        if entry is None:
+            raise KeyError(f"Parameter {name} does not exist in section {section}")
+        if entry.status == "Added":
+            section_.lines.remove(entry)
+        else:
+            entry.status = "Removed"
+        self.dirty = True
+
+    def toDicts(self):
+        """Returns the section names and a {section: {parameter: value}} dictionary of the Fortran values."""
+        return self.sectionNames(), {section.name: {name: entry.value for name, entry in section.entries.items()}
+                                     for section in reversed(self.sections)}
+
+    def render(self, overrides=None, allSections=False):
+        """Returns the full text of the document.
+
+        Args:
+            overrides (dict, optional): {section: {parameter: value}} to render instead of the current values,
+                                        without changing the document. Missing parameters and sections are added.
+                                        Defaults to None.
+            allSections (bool, optional): Apply the overrides to every occurrence of a section that appears
+                                          more than once, instead of only the first one. Defaults to False.
+        """
+        if not overrides:
+            return "".join(item.render() if isinstance(item, NamelistSection) else item for item in self.items)
+        text = []
+        for item in self.items:
+            if isinstance(item, NamelistSection):
+                if allSections or self.sectionIndex[item.name] is item:
+                    text.append(item.render(overrides.get(item.name)))
+                else:
+                    text.append(item.render())
+            else:
+                text.append(item)
+        for section, values in overrides.items():
+            if section not in self.sectionIndex:
+                if text and not text[-1].endswith("\n"):
+                    text.append("\n")
+                text.append("\n")
+                text.append(NamelistSection(section).render(values))
+        return "".join(text)
+
+    def flush(self, path=None):
+        """Writes the document to disk if it has unwritten changes, or unconditionally to a new path.
+
+        Args:
+            path (str, optional): Path to write to. Defaults to the path the document was read from.
+        """
+        if path is None:
+            if not self.dirty:
+                return
+            path = self.path
+        atomicWrite(path, self.render())
+        if path == self.path:
+            self.dirty = False
+            self.signature = fileSignature(path)
+
+
+def readShared(path):
+    """Returns a parsed namelist file from a process-wide cache, shared by all callers.
+    The file is parsed again only if its mtime, size or inode changed. The returned document must not be modified.
+
+    Args:
+        path (str): Path to the namelist file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+
+    Returns:
+        NamelistDocument: The parsed document.
+    """
+    path = os.path.abspath(path)
+    with _shared_lock:
+        document = _shared.get(path)
+    if document is None or document.isStale():
+        document = NamelistDocument.read(path)
+        with _shared_lock:
+            _shared[path] = document
+    return document
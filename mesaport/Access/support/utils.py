@@ -1,4 +1,6 @@
 import os
+import stat
+import tempfile
 
 class cwd:
     """
@@ -19,4 +21,28 @@ class cwd:
         os.chdir(self.newPath)
 
     def __exit__(self, etype, value, traceback):
-        os.chdir(self.savedPath)
\ No newline at end of file
+        os.chdir(self.savedPath)
+
+def atomicWrite(path, text):
+    """
+    Writes text to a file atomically, by writing a temporary file in the same directory and renaming it over the
+    destination. Readers see either the old or the new file, never a partial one, and no working directory change
+    is needed, so it is safe to use from several threads at once. The permissions of an existing file are kept.
+    A symbolic link is written through: its target is replaced and the link is kept.
+    """
+    path = os.path.realpath(os.path.expanduser(path))
+    directory, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(text)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -15,11 +15,21 @@ Methods:
     delete(): Deletes the project.
     clean(): Cleans the project.
     make(silent=False): Makes the project.
-    run(silent=True, logging=True, parallel=False, trace=None, env=os.environ.copy()): Runs the project.
+    run(silent=True, logging=True, parallel=False, trace=None, env=os.environ.copy(), cache=False, cache_dir=None): Runs the project.
     resume(photo=None, silent=True, target=None, logging=True, parallel=False, trace=None, env=os.environ.copy()): Resumes the run from a given photo.
+    run_async(silent=True, logging=True, env=None): Coroutine that runs the project from the asyncio event loop.
+    resume_async(photo=None, target=None, silent=True, logging=True, env=None): Coroutine that resumes the run.
+    run_gyre_async(gyre_in, files='all', ..., max_concurrent=None): Coroutine that runs GYRE on profiles.
+    runWithGyre(gyre_in, target=None, data_format="GYRE", n_cores=None, gyre_input_params=None, ...): Runs the project and GYRE
+            on each profile as soon as it is written.
     runGyre(gyre_in, files='all', wdir=None, data_format="GYRE", silent=True, target=None, logging=True, logfile="gyre.log",
-            parallel=False, n_cores=None, gyre_input_params=None, env=os.environ.copy()): Runs GYRE.
+            parallel=False, n_cores=None, gyre_input_params=None, env=os.environ.copy(), incremental=False, force=False,
+            backend=None, schedule="longest", continuation=False, continuation_padding=0.1): Runs GYRE.
+    storeGyre(store=None, target=None, wdir=None, kind="ad", n_cores=None, backend="process"): Ingests the GYRE
+            summary files into a columnar store.
 """
 
 from .project_ops import ProjectOps
-from . import ops_helper, istarmap
+from .selector import ProfileSelector
+from .gyre_store import GyreStore
+from . import ops_helper, executor, supervisor, run_cache, gyre_manifest, scheduler, selector, continuation, gyre_store
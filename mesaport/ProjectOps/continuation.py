@@ -0,0 +1,185 @@
+import os
+import math
+import time
+from collections import Counter
+
+from ..Access import GyreAccess
+from ..Access.namelist import NamelistDocument, NamelistSection
+from ..Access.access_helper import toPythonType
+from . import ops_helper, gyre_store
+
+"""
+This module implements the frequency-scan continuation of `ProjectOps.runGyre`.
+
+Consecutive profiles of a track have nearly the same spectrum, so the modes found for one profile tell where to look
+for the modes of the next one. With continuation, the `&scan` range of each profile is narrowed to the frequencies
+found for the previous profile, padded on both sides and clipped to the full range of the GYRE input file,
+and `n_freq` is reduced to keep the same density of scan points. The narrowed range is passed as GYRE input
+parameters. If the narrowed scan finds fewer modes of some degree than the previous profile, or fails,
+the profile is run again on the full range.
+
+Continuation is only used if the summary frequencies are in the same units and frame as the `&scan` range.
+
+Attributes:
+    PADDING (float): Default relative padding of the narrowed range.
+    MIN_N_FREQ (int): Smallest number of scan points of a narrowed range.
+
+Methods:
+    read_summary(path): Reads the columns of a GYRE summary file in TXT format.
+    scan_range(text): Returns the full frequency scan of a GYRE input file.
+    narrowed(scan, freqs, padding=PADDING): Returns the scan parameters narrowed to a set of frequencies.
+    run_chain(files, gyre_input_params, padding=PADDING, **kwargs): Runs GYRE on consecutive profiles with continuation.
+"""
+
+PADDING = 0.1
+MIN_N_FREQ = 10
+
+## GYRE defaults of the &scan and output parameters used here
+SCAN_DEFAULTS = {"grid_type": "LINEAR", "freq_min": 1.0, "freq_max": 10.0, "n_freq": 10,
+                 "freq_units": "NONE", "freq_frame": "INERTIAL"}
+
+
+def read_summary(path):
+    """Reads the per-mode columns of a GYRE summary file in TXT format, see `gyre_store.read_summary`.
+
+    Args:
+        path (str): Path to the summary file.
+
+    Returns:
+        dict: {column name: list of values}, with a "freq" column for the real part of the frequency.
+              None if the file cannot be read or has no frequency column.
+    """
+    try:
+        columns = gyre_store.read_summary(path)
+    except (OSError, ValueError):
+        return None
+    freq = "Re(freq)" if "Re(freq)" in columns else "freq" if "freq" in columns else None
+    if freq is None:
+        return None
+    columns["freq"] = [float(value) for value in columns[freq]]
+    return columns
+
+
+def _value(section, name):
+    entry = section.entries.get(name) if section is not None else None
+    value = toPythonType(entry.value) if entry is not None else SCAN_DEFAULTS[name]
+    return value.upper() if isinstance(value, str) else value
+
+
+def scan_range(text):
+    """Returns the full frequency scan of a rendered GYRE input file, over all its `&scan` sections.
+
+    Args:
+        text (str): The GYRE input file.
+
+    Returns:
+        dict: grid_type, freq_min, freq_max and n_freq of the scan, and the summary file (relative to the
+              profiles directory). None if the scan cannot be narrowed from the summary frequencies,
+              e.g. if they are not in the units of the scan.
+    """
+    document = NamelistDocument(text)
+    scans = [item for item in document.items if isinstance(item, NamelistSection) and item.name == "scan"]
+    for output in ("ad_output", "nad_output"):
+        summary_file = document.get(output, "summary_file")
+        if summary_file is not None:
+            break
+    if not scans or summary_file is None:
+        return None
+    output = document.section(output)
+    units = {(_value(output, "freq_units"), _value(output, "freq_frame"))}
+    for scan in scans:
+        for name in ("freq_min_units", "freq_max_units"):
+            entry = scan.entries.get(name, scan.entries.get("freq_units"))
+            units.add((toPythonType(entry.value).upper() if entry is not None else SCAN_DEFAULTS["freq_units"],
+                       _value(scan, "freq_frame")))
+    grid_types = {_value(scan, "grid_type") for scan in scans}
+    if len(units) > 1 or len(grid_types) > 1:
+        return None
+    return {"grid_type": grid_types.pop(),
+            "freq_min": min(float(_value(scan, "freq_min")) for scan in scans),
+            "freq_max": max(float(_value(scan, "freq_max")) for scan in scans),
+            "n_freq": max(int(_value(scan, "n_freq")) for scan in scans),
+            "summary_file": toPythonType(summary_file)}
+
+
+def _extent(grid_type, freq_min, freq_max):
+    ## Width of a range in the spacing of the scan grid
+    if grid_type == "INVERSE":
+        return 1/freq_min - 1/freq_max
+    elif grid_type == "LOG":
+        return math.log(freq_max/freq_min)
+    return freq_max - freq_min
+
+
+def narrowed(scan, freqs, padding=PADDING):
+    """Returns the scan parameters narrowed to a set of frequencies, padded and clipped to the full scan,
+    with the same density of scan points as the full scan.
+
+    Args:
+        scan (dict): The full scan, as returned by `scan_range`.
+        freqs (list): The frequencies to cover.
+        padding (float, optional): Relative padding on both sides. Defaults to PADDING.
+
+    Returns:
+        dict: freq_min, freq_max and n_freq, as GYRE input parameters. None if there are no frequencies in the range.
+    """
+    freqs = [freq for freq in freqs if scan["freq_min"] <= freq <= scan["freq_max"]]
+    if not freqs:
+        return None
+    freq_min = max(scan["freq_min"], min(freqs)*(1 - padding))
+    freq_max = min(scan["freq_max"], max(freqs)*(1 + padding))
+    full = _extent(scan["grid_type"], scan["freq_min"], scan["freq_max"])
+    fraction = _extent(scan["grid_type"], freq_min, freq_max)/full if full > 0 else 1
+    n_freq = min(scan["n_freq"], max(MIN_N_FREQ, math.ceil(scan["n_freq"]*fraction)))
+    return {"freq_min": freq_min, "freq_max": freq_max, "n_freq": n_freq}
+
+
+def _modes(summary):
+    ## Number of modes of each degree
+    if summary is None:
+        return None
+    return Counter(summary["l"]) if "l" in summary else Counter({None: len(summary["freq"])})
+
+
+def run_chain(files, gyre_input_params, padding=PADDING, **kwargs):
+    """Runs GYRE on consecutive profiles, narrowing the scan of each profile to the modes of the previous one.
+    The task function of `ProjectOps.runGyre` with continuation.
+
+    Args:
+        files (list): The profile files, in evolutionary order.
+        gyre_input_params (list): The GYRE input parameters of each profile (dict or None).
+        padding (float, optional): Relative padding of the narrowed range. Defaults to PADDING.
+        **kwargs: The arguments of `ops_helper.run_subprocess`, which include gyre_in, wdir and data_format.
+
+    Returns:
+        list: (success, runtime in seconds, scan) for each profile,
+              where scan is "full", "narrowed" or "fallback" (narrowed, then run again on the full range).
+    """
+    gyre_obj = GyreAccess()
+    results = []
+    previous = None
+    for filename, params in zip(files, gyre_input_params):
+        start = time.perf_counter()
+        try:
+            scan = scan_range(gyre_obj.render(kwargs["gyre_in"], filename, kwargs["data_format"],
+                                              params, kwargs.get("write_detail_output", False)))
+        except Exception:
+            ## Let the full run report the problem
+            scan = None
+        window = narrowed(scan, previous["freq"], padding) if scan is not None and previous is not None else None
+        summary, kind = None, "full"
+        if window is not None:
+            success = ops_helper.gyre_task(filename, {**(params or {}), **window}, **kwargs) is not False
+            summary = read_summary(os.path.join(kwargs["wdir"], scan["summary_file"])) if success else None
+            found, expected = _modes(summary), _modes(previous)
+            if summary is not None and all(found[l] >= count for l, count in expected.items()):
+                kind = "narrowed"
+            else:
+                ## Modes went missing, run again on the full range
+                kind = "fallback"
+        if kind != "narrowed":
+            success = ops_helper.gyre_task(filename, params, **kwargs) is not False
+            summary = read_summary(os.path.join(kwargs["wdir"], scan["summary_file"])) if success and scan is not None else None
+        results.append((success, time.perf_counter() - start, kind))
+        previous = summary if summary is not None and summary["freq"] else None
+    return results
@@ -0,0 +1,138 @@
+import os
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from rich import progress
+
+from ..Access.cache import sharedGyreDefaults
+
+"""
+This module implements the executor layer used to run many independent tasks, e.g. one GYRE run per profile,
+with a process pool, a thread pool or serially.
+
+Every backend runs the same way: at most a bounded number of tasks are in flight, each worker is set up once
+by an initializer, and every task yields its own result or exception as soon as it completes, with the same
+progress bar whatever the backend.
+
+Attributes:
+    BACKENDS (tuple): The available backends, "process", "thread" and "serial".
+    progress_columns (tuple): The columns of the progress bars of MESA-PORT.
+
+Methods:
+    initWorker(env=None): Sets up a worker process or thread once, before it runs any task.
+    execute(func, tasks, backend="thread", workers=None, initializer=initWorker, initargs=(), description=None):
+        Runs func(*task) for every task and yields the TaskResult of each task as it completes.
+"""
+
+BACKENDS = ("process", "thread", "serial")
+
+progress_columns = (progress.SpinnerColumn(spinner_name="moon"),
+                    progress.MofNCompleteColumn(),
+                    *progress.Progress.get_default_columns(),
+                    progress.TimeElapsedColumn())
+
+TaskResult = namedtuple("TaskResult", ["index", "task", "result", "error", "elapsed"])
+TaskResult.__doc__ = """The outcome of one task: its position in the task list, its arguments,
+the return value of the function, the exception it raised (None if it did not raise)
+and the time the task ran for in its worker, in seconds."""
+
+
+def initWorker(env=None):
+    """Sets up a worker once, before it runs any task.
+
+    Args:
+        env (dict, optional): Environment of the worker, only for process workers,
+                              so that it is not sent along with every task. Defaults to None.
+    """
+    if env is not None:
+        os.environ.clear()
+        os.environ.update(env)
+    if "GYRE_DIR" in os.environ:
+        ## Loads the GYRE parameter table into the worker's registry, from the on-disk cache
+        sharedGyreDefaults()
+
+
+def _call(func, task):
+    start = time.perf_counter()
+    try:
+        return func(*task), None, time.perf_counter() - start
+    except Exception as e:
+        e.traceback = traceback.format_exc()
+        return None, e, time.perf_counter() - start
+
+
+def execute(func, tasks, backend="thread", workers=None, initializer=initWorker, initargs=(), description=None):
+    """Runs func(*task) for every task and yields the result of each task as soon as it completes.
+
+    Args:
+        func (callable): The function to run. Must be picklable for the "process" backend.
+        tasks (iterable): Tuples of positional arguments, one per task. Consumed lazily.
+                          A lazy iterable may yield None when no task is ready yet, e.g. while tasks are
+                          discovered as they appear: the tasks completed meanwhile are yielded, then the next task
+                          is requested again. The iterable should wait a little before yielding None.
+        backend (str, optional): "process", "thread" or "serial". Defaults to "thread".
+        workers (int, optional): Number of workers. Defaults to None, using the number of CPUs.
+        initializer (callable, optional): Run once in every worker before its first task. Defaults to initWorker.
+        initargs (tuple, optional): Arguments of the initializer. Defaults to ().
+        description (str, optional): Description of the progress bar. Defaults to None, without a progress bar.
+
+    Raises:
+        ValueError: If the backend is invalid.
+
+    Yields:
+        TaskResult: The outcome of each task, in order of completion.
+                    Exceptions raised by a task are returned in its TaskResult, not raised,
+                    with the formatted traceback in their `traceback` attribute.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Invalid backend '{backend}'. Use one of {', '.join(BACKENDS)}.")
+    total = len(tasks) if hasattr(tasks, "__len__") else None
+    workers = max(1, workers if workers is not None else (os.cpu_count() or 1))
+    with progress.Progress(*progress_columns, disable=description is None) as progressbar:
+        bar = progressbar.add_task(description or "", total=total)
+        if backend == "serial":
+            if initializer is not None:
+                initializer(*initargs)
+            for index, task in enumerate(task for task in tasks if task is not None):
+                result, error, elapsed = _call(func, task)
+                progressbar.advance(bar)
+                yield TaskResult(index, task, result, error, elapsed)
+            return
+        Pool = ProcessPoolExecutor if backend == "process" else ThreadPoolExecutor
+        with Pool(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+            pending = {}
+            tasks = iter(tasks)
+            index = 0
+            exhausted = False
+            while True:
+                idle = False
+                ## Bounded: never more than two tasks per worker submitted at once
+                while not exhausted and len(pending) < 2*workers:
+                    try:
+                        task = next(tasks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if task is None:
+                        idle = True
+                        break
+                    pending[pool.submit(_call, func, task)] = (index, task)
+                    index += 1
+                if not pending:
+                    if exhausted:
+                        break
+                    continue
+                ## With no task ready, only collect the tasks completed so far and ask for the next task again
+                done, _ = wait(pending, timeout=0 if idle else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    done_index, done_task = pending.pop(future)
+                    try:
+                        result, error, elapsed = future.result()
+                    except Exception as e:
+                        ## The worker itself failed, e.g. a process pool broken by a killed worker
+                        e.traceback = traceback.format_exc()
+                        result, error, elapsed = None, e, None
+                    progressbar.advance(bar)
+                    yield TaskResult(done_index, done_task, result, error, elapsed)
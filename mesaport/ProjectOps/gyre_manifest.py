@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import hashlib
+
+from ..Access import GyreAccess
+from ..Access.namelist import NamelistDocument
+from ..Access.access_helper import toPythonType
+from ..Access.support.utils import atomicWrite
+
+"""
+This module implements the manifest of incremental GYRE runs, which lets `ProjectOps.runGyre` skip
+profiles whose outputs are up to date.
+
+For each profile, the manifest records the hash of the profile file, the hash of the GYRE input file rendered
+for it, the summary files GYRE wrote and whether the run succeeded. A profile is run again if it is new,
+if the profile file or its rendered input changed, if its last run failed or if one of its outputs is missing.
+A run that wrote none of the summary files of its input is recorded as failed.
+
+The manifest is an append-only JSON lines journal (`gyre_manifest.jsonl` in the profiles directory),
+so every finished profile is recorded at once with a small append and an interrupted batch resumes
+where it stopped. The last record of a profile wins. The journal is compacted at the end of each batch.
+
+Classes:
+    GyreManifest: The manifest of the profiles in one directory.
+"""
+
+MANIFEST = "gyre_manifest.jsonl"
+
+
+class GyreManifest:
+    def __init__(self, logs_dir):
+        """Initializes the GyreManifest class, reading the manifest of a profiles directory if it exists.
+
+        Args:
+            logs_dir (str): The directory with the profiles, in which GYRE runs.
+        """
+        self.logs_dir = logs_dir
+        self.path = os.path.join(logs_dir, MANIFEST)
+        self.entries = {}
+        try:
+            with open(self.path) as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        ## A line cut short by an interrupted write
+                        continue
+                    self.entries[entry["profile"]] = entry
+        except OSError:
+            pass
+        self.gyre_obj = None
+
+
+    def profileHash(self, filename):
+        """Returns the sha256 of a profile file, reusing the recorded hash if the file's size and mtime did not change.
+
+        Returns:
+            str, int, int: The hash, the size and the mtime of the profile file.
+        """
+        path = os.path.join(self.logs_dir, filename)
+        stat = os.stat(path)
+        entry = self.entries.get(filename)
+        if entry is not None and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns:
+            return entry["profile_hash"], stat.st_size, stat.st_mtime_ns
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest(), stat.st_size, stat.st_mtime_ns
+
+
+    def check(self, filename, gyre_in, data_format, gyre_input_params=None, write_detail_output=False):
+        """Checks if the outputs of a profile are up to date.
+
+        Args:
+            filename (str): The profile file.
+            gyre_in (str): Path to the template GYRE input file.
+            data_format (str): The data format of the profile file.
+            gyre_input_params (dict or list of dicts, optional): The user parameters. Defaults to None.
+            write_detail_output (bool, optional): If detail outputs are written. Defaults to False.
+
+        Returns:
+            bool, dict: True if the profile can be skipped, and the pending record to pass to `record` after running it.
+        """
+        if self.gyre_obj is None:
+            self.gyre_obj = GyreAccess()
+        text = self.gyre_obj.render(gyre_in, filename, data_format, gyre_input_params, write_detail_output)
+        try:
+            profile_hash, size, mtime = self.profileHash(filename)
+        except OSError:
+            ## Missing profile, let GYRE report it
+            return False, None
+        document = NamelistDocument(text)
+        outputs = []
+        for section in ("ad_output", "nad_output"):
+            value = document.get(section, "summary_file")
+            if value is not None:
+                outputs.append(toPythonType(value))
+        pending = {"profile": filename, "profile_hash": profile_hash, "size": size, "mtime": mtime,
+                   "input_hash": hashlib.sha256(text.encode()).hexdigest(), "outputs": outputs}
+        entry = self.entries.get(filename)
+        ## An input without summary files has no outputs to check, any other needs at least one of them
+        upToDate = (entry is not None and entry.get("status") == "done"
+                    and entry["profile_hash"] == profile_hash and entry["input_hash"] == pending["input_hash"]
+                    and (entry["outputs"] or not outputs)
+                    and all(os.path.exists(os.path.join(self.logs_dir, output)) for output in entry["outputs"]))
+        return upToDate, pending
+
+
+    def record(self, pending, success):
+        """Records the result of a profile's GYRE run, appending it to the journal.
+
+        Args:
+            pending (dict): The pending record returned by `check`.
+            success (bool): True if the GYRE run succeeded.
+        """
+        if pending is None:
+            return
+        entry = dict(pending)
+        entry["time"] = time.time()
+        ## Only the summary files that were actually written, e.g. no non-adiabatic summary for adiabatic runs
+        entry["outputs"] = [output for output in pending["outputs"] if os.path.exists(os.path.join(self.logs_dir, output))]
+        if pending["outputs"] and not entry["outputs"]:
+            success = False
+        entry["status"] = "done" if success else "failed"
+        self.entries[entry["profile"]] = entry
+        with open(self.path, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+
+
+    def compact(self):
+        """Rewrites the journal with only the last record of each profile."""
+        if self.entries:
+            atomicWrite(self.path, "".join(json.dumps(entry) + "\n" for entry in self.entries.values()))
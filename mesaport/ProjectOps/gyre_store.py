@@ -0,0 +1,310 @@
+import os
+import json
+import shutil
+
+import numpy as np
+
+from ..Access.support.utils import atomicWrite
+from ..Access.access_helper import toPythonTypes
+from .executor import execute
+from .ops_helper import read_profiles_index
+
+"""
+This module defines the `GyreStore` class, a columnar store of the GYRE summary outputs of one or more LOGS directories.
+
+`ProjectOps.runGyre` writes one summary file per profile (profileN-freqs.dat, profileN-freqs-nad.dat). The store
+ingests them once, in parallel, into one NumPy `.npy` file per column (l, n_pg, Re(freq), E_norm, ...), with one
+row per mode. The rows of a profile are contiguous, and every row carries the source LOGS directory, the profile
+number and the model number (from profiles.index) of its profile. Scalar summary items (e.g. M_star) are repeated
+on every row of their profile. Columns are opened memory-mapped, so a store of a whole grid opens without reading
+it. Ingesting again only parses the summary files that are new or changed since they were stored.
+
+Store layout:
+    meta.json: Generation, column names, sources and the summary file of every profile.
+    v<generation>/columns/<column>.npy: One array per column, one row per mode.
+    v<generation>/profiles/<field>.npy: One array per field (source, profile_number, model_number, start, count,
+                                        size, mtime), one row per profile.
+Every ingest that changes the store writes a new generation and then switches meta.json to it,
+so an interrupted ingest leaves the previous store intact.
+
+Attributes:
+    SUFFIXES (dict): The summary file suffix of each kind of output, "ad" and "nad".
+
+Classes:
+    GyreStore: The store.
+
+Methods:
+    read_summary(path): Reads a GYRE summary file in TXT format.
+"""
+
+SUFFIXES = {"ad": "-freqs.dat", "nad": "-freqs-nad.dat"}
+## Largest number of summary files parsed by one task
+CHUNK_SIZE = 256
+PROFILE_FIELDS = ("source", "profile_number", "model_number", "start", "count", "size", "mtime")
+
+
+def _isNumber(token):
+    try:
+        float(token.replace("D", "E").replace("d", "e"))
+    except ValueError:
+        return False
+    return True
+
+
+def read_summary(path):
+    """Reads a GYRE summary file in TXT format: blocks of a column-number line, a line of names and rows of values.
+    The last block holds one row per mode. Earlier blocks hold the scalar items, which are repeated on every row.
+
+    Args:
+        path (str): Path to the summary file.
+
+    Raises:
+        ValueError: If the file has no block of values, or a value is not a number.
+
+    Returns:
+        dict: {column name: list of int or float values}.
+    """
+    blocks = []
+    with open(path) as file:
+        for line in file:
+            tokens = line.split()
+            if not tokens:
+                continue
+            if not _isNumber(tokens[0]):
+                ## A line of names starts a block, the line of column numbers before it is not a row
+                if blocks and blocks[-1][1] and blocks[-1][1][-1] == [str(j) for j in range(1, len(tokens) + 1)]:
+                    blocks[-1][1].pop()
+                blocks.append((tokens, []))
+            elif blocks and len(tokens) == len(blocks[-1][0]):
+                blocks[-1][1].append(tokens)
+    if not blocks:
+        raise ValueError(f"No GYRE summary data in {path}.")
+    names, rows = blocks[-1]
+    try:
+        ## Rows are kept as text and converted a whole column at a time
+        columns = {name: toPythonTypes([row[j] for row in rows]) for j, name in enumerate(names)}
+        for scalar_names, scalar_rows in blocks[:-1]:
+            if len(scalar_rows) == 1:
+                for name, value in zip(scalar_names, toPythonTypes(scalar_rows[0])):
+                    columns.setdefault(name, [value]*len(rows))
+    except (AttributeError, IndexError) as e:
+        raise ValueError(f"Invalid GYRE summary value in {path}: {e}")
+    return columns
+
+
+def _read(paths):
+    ## Task function of the parallel ingest: parses a chunk of summary files, returning (columns, None) or (None, error)
+    tables = []
+    for path in paths:
+        try:
+            columns = read_summary(path)
+        except (OSError, ValueError) as e:
+            tables.append((None, e))
+            continue
+        tables.append(({name: (np.array(values, dtype=np.int64) if all(isinstance(value, int) for value in values)
+                               else np.array(values, dtype=float)) for name, values in columns.items()}, None))
+    return tables
+
+
+class GyreStore:
+    def __init__(self, path):
+        """Initializes the GyreStore class, opening the store in a directory if it exists.
+
+        Args:
+            path (str): The store directory.
+        """
+        self.path = os.path.abspath(path)
+        self._columns = {}
+        self.generation = 0
+        self.columns, self.sources, self.files = [], [], []
+        self.profiles = {field: np.zeros(0, dtype=np.int64) for field in PROFILE_FIELDS}
+        try:
+            with open(os.path.join(self.path, "meta.json")) as file:
+                meta = json.load(file)
+            self.generation = meta["generation"]
+            self.profiles = {field: np.load(os.path.join(self._dataDir(), "profiles", f"{field}.npy"))
+                             for field in PROFILE_FIELDS}
+        except (OSError, ValueError, KeyError):
+            return
+        self.columns, self.sources, self.files = meta["columns"], meta["sources"], meta["files"]
+
+
+    def __len__(self):
+        """Returns the number of rows (modes) in the store."""
+        return int(self.profiles["count"].sum())
+
+
+    def __getitem__(self, column):
+        """Returns a column of all rows, memory-mapped.
+
+        Raises:
+            KeyError: If the column does not exist.
+        """
+        if column in PROFILE_FIELDS[:3]:
+            return np.repeat(self.profiles[column], self.profiles["count"])
+        if column not in self.columns:
+            raise KeyError(f"Column '{column}' not found. Available columns: {', '.join(self.columns)}.")
+        if column not in self._columns:
+            self._columns[column] = np.load(self._columnPath(column), mmap_mode="r")
+        return self._columns[column]
+
+
+    def _dataDir(self, generation=None):
+        return os.path.join(self.path, f"v{self.generation if generation is None else generation}")
+
+
+    def _columnPath(self, column, generation=None):
+        ## Column names such as Re(freq) are valid file names, except for the path separator
+        return os.path.join(self._dataDir(generation), "columns", column.replace(os.sep, "_") + ".npy")
+
+
+    def rows(self, profile_number=None, model_number=None, source=None):
+        """Returns the row indices of the modes of the profiles with a profile number and/or model number.
+
+        Args:
+            profile_number (int or list, optional): Profile numbers. Defaults to None, any profile.
+            model_number (int or list, optional): Model numbers. Defaults to None, any model.
+            source (str, optional): Only the profiles of this LOGS directory. Defaults to None, all sources.
+
+        Returns:
+            numpy.ndarray: The row indices, in store order.
+        """
+        mask = np.ones(len(self.files), dtype=bool)
+        if profile_number is not None:
+            mask &= np.isin(self.profiles["profile_number"], profile_number)
+        if model_number is not None:
+            mask &= np.isin(self.profiles["model_number"], model_number)
+        if source is not None:
+            source = os.path.abspath(source)
+            mask &= self.profiles["source"] == (self.sources.index(source) if source in self.sources else -1)
+        starts, counts = self.profiles["start"][mask], self.profiles["count"][mask]
+        if len(starts) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, start + count) for start, count in zip(starts, counts)])
+
+
+    def table(self, columns=None, **selection):
+        """Returns the modes of selected profiles, see `rows` for the selection.
+
+        Args:
+            columns (list, optional): The columns. Defaults to None, all columns.
+            **selection: profile_number, model_number and source, as for `rows`.
+
+        Returns:
+            dict: {column name: numpy array}, with the source, profile_number and model_number of every row.
+        """
+        rows = self.rows(**selection) if selection else slice(None)
+        columns = [*PROFILE_FIELDS[:3], *(self.columns if columns is None else columns)]
+        return {column: np.asarray(self[column][rows]) for column in columns}
+
+
+    def ingest(self, logs_dir, kind="ad", n_cores=None, backend="process"):
+        """Ingests the GYRE summary files of a LOGS directory, parsing only the files that are new or changed.
+        Profiles whose summary file was removed are dropped.
+
+        Args:
+            logs_dir (str): The LOGS directory.
+            kind (str, optional): "ad" for the adiabatic summaries (profileN-freqs.dat)
+                                  or "nad" for the non-adiabatic ones (profileN-freqs-nad.dat). Defaults to "ad".
+            n_cores (int, optional): Number of workers parsing summary files. Defaults to None, using all cores.
+            backend (str, optional): "process", "thread" or "serial", see `executor.execute`. Defaults to "process".
+
+        Raises:
+            ValueError: If the kind is invalid.
+
+        Returns:
+            int, int, int: The number of profiles parsed, reused and removed.
+        """
+        if kind not in SUFFIXES:
+            raise ValueError(f"Invalid kind '{kind}'. Use 'ad' or 'nad'.")
+        suffix = SUFFIXES[kind]
+        logs_dir = os.path.abspath(logs_dir)
+        if logs_dir not in self.sources:
+            self.sources.append(logs_dir)
+        source = self.sources.index(logs_dir)
+        models = {number: model for model, _, number in read_profiles_index(logs_dir)}
+        found = {}
+        with os.scandir(logs_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(suffix) or (kind == "ad" and entry.name.endswith(SUFFIXES["nad"])):
+                    continue
+                stem = entry.name[:-len(suffix)]
+                digits = stem[len("profile"):] if stem.startswith("profile") else stem
+                stat = entry.stat()
+                found[entry.name] = (int(digits) if digits.isdigit() else -1, stat.st_size, stat.st_mtime_ns)
+        ## Profiles of other sources, and unchanged profiles of this one, keep their rows
+        kept, reused, removed = [], 0, 0
+        for i, filename in enumerate(self.files):
+            if self.profiles["source"][i] != source:
+                kept.append(i)
+            elif filename not in found:
+                removed += 1
+            elif found[filename][1:] == (self.profiles["size"][i], self.profiles["mtime"][i]):
+                kept.append(i)
+                reused += 1
+                del found[filename]
+        parsed = {}
+        names = sorted(found)
+        ## Chunks of files per task, so that workers are not sent one small file at a time
+        workers = n_cores if n_cores is not None else (os.cpu_count() or 1)
+        size = min(CHUNK_SIZE, max(1, len(names)//(4*workers)))
+        chunks = [names[i:i + size] for i in range(0, len(names), size)]
+        for outcome in execute(_read, [([os.path.join(logs_dir, name) for name in chunk],) for chunk in chunks],
+                               backend=backend, workers=workers, initializer=None,
+                               description="[b i cyan3]Ingesting GYRE summaries..." if names else None):
+            paths, = outcome.task
+            chunk = [os.path.basename(path) for path in paths]
+            results = outcome.result if outcome.error is None else [(None, outcome.error)]*len(chunk)
+            for name, (columns, error) in zip(chunk, results):
+                if error is not None:
+                    print(f"Skipping {name}: {error}")
+                else:
+                    parsed[name] = columns
+        if not parsed and len(kept) == len(self.files):
+            return 0, reused, 0
+        self._write(kept, [(name, source, *found[name], models.get(found[name][0], -1), parsed[name]) for name in parsed])
+        return len(parsed), reused, removed
+
+
+    def _write(self, kept, new):
+        ## Rewrites the store with the kept profiles (indices of the current store) and the new ones,
+        ## ordered by source, model number and profile number
+        old = {column: self[column] for column in self.columns}
+        profiles = [("old", i, self.profiles["source"][i], self.profiles["model_number"][i],
+                     self.profiles["profile_number"][i]) for i in kept]
+        profiles += [("new", j, source, model, number) for j, (_, source, number, _, _, model, _) in enumerate(new)]
+        profiles.sort(key=lambda profile: profile[2:])
+        columns = list(dict.fromkeys([*self.columns, *(name for *_, data in new for name in data)]))
+        parts = {column: [] for column in columns}
+        fields = {field: [] for field in PROFILE_FIELDS}
+        files, start = [], 0
+        for origin, i, source, model, number in profiles:
+            if origin == "old":
+                begin, count = self.profiles["start"][i], self.profiles["count"][i]
+                data = {column: values[begin:begin + count] for column, values in old.items()}
+                filename, size, mtime = self.files[i], self.profiles["size"][i], self.profiles["mtime"][i]
+            else:
+                filename, _, _, size, mtime, _, data = new[i]
+                count = len(next(iter(data.values()))) if data else 0
+            for column in columns:
+                ## Columns missing from a summary file are NaN
+                parts[column].append(data[column] if column in data else np.full(count, np.nan))
+            for field, value in zip(PROFILE_FIELDS, (source, number, model, start, count, size, mtime)):
+                fields[field].append(value)
+            files.append(filename)
+            start += count
+        generation = self.generation + 1
+        shutil.rmtree(self._dataDir(generation), ignore_errors=True)
+        os.makedirs(os.path.join(self._dataDir(generation), "columns"))
+        os.makedirs(os.path.join(self._dataDir(generation), "profiles"))
+        for column in columns:
+            np.save(self._columnPath(column, generation), np.concatenate(parts[column]) if parts[column] else np.zeros(0))
+        for field in PROFILE_FIELDS:
+            np.save(os.path.join(self._dataDir(generation), "profiles", f"{field}.npy"), np.array(fields[field], dtype=np.int64))
+        ## Switching the metadata to the new generation commits the ingest
+        atomicWrite(os.path.join(self.path, "meta.json"),
+                    json.dumps({"generation": generation, "columns": columns, "sources": self.sources, "files": files}))
+        ## Arrays already mapped from the previous generation stay readable after it is removed
+        shutil.rmtree(self._dataDir(), ignore_errors=True)
+        self.generation, self.columns, self.files, self._columns = generation, columns, files, {}
+        self.profiles = {field: np.array(values, dtype=np.int64) for field, values in fields.items()}
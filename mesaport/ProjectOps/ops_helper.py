@@ -1,13 +1,12 @@
 import subprocess
 import shlex
-import sys, os, time
+import sys, os
 from pathlib import Path
-import shutil
 from rich import print
 import traceback
 
 from ..Access.support import *
-from ..Access.access_helper import toFortranType, toPythonType
+from ..Access.access_helper import toPythonType
 from ..Access import MesaAccess, GyreAccess
 
 def check_exists(exists, projName):
@@ -46,9 +45,9 @@ def run_subprocess(commands, wdir, silent=True, runlog='', status=None,
                 # profile_num = filename.split('/')[-1].split(f".{data_format}")[0]
                 profile_stem = Path(filename).stem.split(".data")[0]
                 new_gyre_in = os.path.join(wdir, f"gyre{profile_stem}.in")
-                gyre_obj.modify_gyre_params(wdir, filename, data_format, gyre_in=new_gyre_in, write_detail_output=write_detail_output)
-                gyre_obj.set(arg=gyre_input_params, wdir=wdir, gyre_in=new_gyre_in)
-                time.sleep(1)
+                ## Unique per profile and written atomically, so it is complete before GYRE starts
+                gyre_obj.writeGyreIn(gyre_in, new_gyre_in, filename, data_format,
+                                     gyre_input_params=gyre_input_params, write_detail_output=write_detail_output)
 
                 # Update gyre_in to the new file
                 gyre_in = new_gyre_in
@@ -56,10 +55,9 @@ def run_subprocess(commands, wdir, silent=True, runlog='', status=None,
                 runlog = os.path.join(wdir, f"gyre{profile_stem}.log")
             else:
                 new_gyre_in = os.path.join(wdir, "gyre.in")
-                shutil.copyfile(gyre_in, new_gyre_in)
+                gyre_obj.writeGyreIn(gyre_in, new_gyre_in, filename, data_format,
+                                     gyre_input_params=gyre_input_params, write_detail_output=write_detail_output)
                 gyre_in = new_gyre_in
-                gyre_obj.modify_gyre_params(wdir, filename, data_format, gyre_in=gyre_in, write_detail_output=write_detail_output)
-                gyre_obj.set(arg=gyre_input_params, wdir=wdir, gyre_in=gyre_in)
         except Exception as e:
             print(traceback.format_exc())
             print(f"Error: {e}")
@@ -141,6 +139,167 @@ def run_subprocess(commands, wdir, silent=True, runlog='', status=None,
                 os.remove(gyre_in)
             return True
 
+def check_photo(work_dir, photo, binary=False, target=None):
+    """Checks that a photo to resume from exists.
+
+    Args:
+        work_dir (str): The project directory.
+        photo (str): Name of the photo.
+        binary (bool, optional): True for a binary star system. Defaults to False.
+        target (str, optional): For binaries, 'primary' or 'secondary'. Defaults to None.
+
+    Raises:
+        ValueError: If the input for argument 'target' is invalid.
+        FileNotFoundError: If the photo does not exist.
+    """
+    if binary:
+        if target == 'primary':
+            photo_path = os.path.join(work_dir, "photos1", photo)
+        elif target == 'secondary':
+            photo_path = os.path.join(work_dir, "photos2", photo)
+        else:
+            raise ValueError('''Invalid input for argument 'target'.  
+                            Please use 'primary' or 'secondary' ''')
+    else:
+        photo_path = os.path.join(work_dir, "photos", photo)
+    if not os.path.isfile(photo_path):
+        raise FileNotFoundError(f"Photo '{photo}' could not be exists.")
+
+
+def gyre_logs_dir(work_dir, binary=False, target=None, wdir=None):
+    """Returns the directory with the profiles GYRE runs on.
+
+    Args:
+        work_dir (str): The project directory.
+        binary (bool, optional): True for a binary star system. Defaults to False.
+        target (str, optional): For binaries, 'primary' or 'secondary'. Defaults to None.
+        wdir (str, optional): A directory with profiles to use instead of the LOGS directory. Defaults to None.
+
+    Raises:
+        ValueError: If the input for argument 'target' is invalid.
+    """
+    if binary:
+        if target == 'primary':
+            return os.path.join(work_dir, "LOGS1") if wdir is None else wdir
+        elif target == 'secondary':
+            return os.path.join(work_dir, "LOGS2") if wdir is None else wdir
+        else:
+            raise ValueError("""Invalid input for argument 'star'.  
+                            Please use primary or secondary""")
+    return os.path.join(work_dir, "LOGS") if wdir is None else wdir
+
+
+def scan_profiles(logs_dir, data_format):
+    """Lists the profile files of a data format in a directory, with one directory read joined with profiles.index.
+
+    Profiles listed in profiles.index come first, in order of model number. If a profile number was reused,
+    its last entry wins. Other files of the data format follow, sorted by the number in their name.
+
+    Args:
+        logs_dir (str): The LOGS directory.
+        data_format (str): The pulsation data format, e.g. "GYRE" for profileN.data.GYRE files.
+
+    Returns:
+        list: (file name, model number, priority, profile number) for each profile.
+              The model number and priority are None for files not listed in profiles.index.
+    """
+    suffix = f".{data_format}"
+    with os.scandir(logs_dir) as entries:
+        names = {entry.name for entry in entries if entry.name.endswith(suffix) and not entry.is_dir()}
+    indexed = {}
+    for model, priority, number in read_profiles_index(logs_dir):
+        filename = f"profile{number}.data{suffix}"
+        if filename in names:
+            indexed[filename] = (filename, model, priority, number)
+    profiles = sorted(indexed.values(), key=lambda profile: profile[1])
+    others = []
+    for filename in names.difference(indexed):
+        stem = filename.split('.')[0]
+        digits = stem[len('profile'):] if stem.startswith('profile') else stem
+        others.append((filename, None, None, int(digits) if digits.isdigit() else None))
+    others.sort(key=lambda profile: (profile[3] is None, profile[3] or 0, profile[0]))
+    return profiles + others
+
+
+def find_profiles(logs_dir, data_format):
+    """Returns the names of all profile files of a data format in a directory, in evolutionary order.
+    See `scan_profiles`.
+
+    Raises:
+        ValueError: If there are no such files.
+    """
+    files = [profile[0] for profile in scan_profiles(logs_dir, data_format)]
+    if len(files) == 0:
+        raise ValueError(f"No {data_format} files found in LOGS directory.")
+    return files
+
+
+def gyre_task(filename, gyre_input_params, **kwargs):
+    """Runs GYRE on one profile, the task function of `ProjectOps.runGyre`. See `run_subprocess` for the arguments."""
+    return run_subprocess(filename=filename, gyre_input_params=gyre_input_params, **kwargs)
+
+
+def read_profiles_index(logs_dir):
+    """Reads the profiles.index file of a LOGS directory.
+
+    Args:
+        logs_dir (str): The LOGS directory.
+
+    Returns:
+        list: (model number, priority, profile number) for each profile, in file order.
+              Empty if the file does not exist yet. Incomplete lines, e.g. while MESA writes the file, are skipped.
+    """
+    try:
+        with open(os.path.join(logs_dir, "profiles.index")) as file:
+            lines = file.read().splitlines()[1:]
+    except OSError:
+        return []
+    index = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 3:
+            try:
+                index.append((int(parts[0]), int(parts[1]), int(parts[2])))
+            except ValueError:
+                continue
+    return index
+
+
+def ready_profiles(logs_dir, data_format, since, seen, final=False):
+    """Returns the profiles written by a running MESA evolution that are complete and not returned yet.
+    A profile is complete once it is listed in profiles.index and its size and mtime did not change
+    since the previous call, or once the evolution finished (final=True).
+
+    Args:
+        logs_dir (str): The LOGS directory.
+        data_format (str): The pulsation data format, e.g. "GYRE" for profileN.data.GYRE files.
+        since (int): Ignore files last modified before this time (in ns), i.e. left over from earlier runs.
+        seen (dict): State kept between calls, pass the same empty dict to every call.
+        final (bool, optional): The evolution finished, all listed files are complete. Defaults to False.
+
+    Returns:
+        list: File names of the newly completed profiles, relative to logs_dir.
+    """
+    ready = []
+    for _, _, number in read_profiles_index(logs_dir):
+        filename = f"profile{number}.data.{data_format}"
+        if seen.get(filename) == "ready":
+            continue
+        try:
+            stat = os.stat(os.path.join(logs_dir, filename))
+        except OSError:
+            continue
+        if stat.st_mtime_ns < since:
+            continue
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if final or seen.get(filename) == signature:
+            seen[filename] = "ready"
+            ready.append(filename)
+        else:
+            seen[filename] = signature
+    return ready
+
+
 def process_outline(outline):
     try:
         keyword1 = outline.split()[-1]
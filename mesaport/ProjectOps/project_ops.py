@@ -3,19 +3,22 @@ import shutil
 import psutil
 import subprocess
 import glob
-from itertools import repeat
-import traceback
+import time
+import functools
+import threading
 
-from rich import print, progress, prompt, status
-progress_columns = (progress.SpinnerColumn(spinner_name="moon"),
-                    progress.MofNCompleteColumn(),
-                    *progress.Progress.get_default_columns(),
-                    progress.TimeElapsedColumn())
-import multiprocessing as mp
+from rich import print, prompt, status
 
-from ..Access import MesaAccess, GyreAccess, MesaEnvironmentHandler
+from ..Access import GyreAccess, MesaEnvironmentHandler
 from . import ops_helper
-from . import istarmap
+from .executor import execute
+from . import run_cache
+from . import gyre_manifest
+from . import supervisor
+from . import scheduler
+from . import continuation as scan_continuation
+from .selector import ProfileSelector
+from .gyre_store import GyreStore
 
 class ProjectOps:
     """This class handles MESA project operations.
@@ -163,7 +166,7 @@ class ProjectOps:
 
 
     
-    def run(self, silent=True, logging=True, parallel=False, trace=None, env=os.environ.copy()):
+    def run(self, silent=True, logging=True, parallel=False, trace=None, env=os.environ.copy(), cache=False, cache_dir=None):
         """
         Runs the project.
         Args:
@@ -172,6 +175,11 @@ class ProjectOps:
             parallel (bool, optional): Run in parallel. Defaults to False.
             trace (list of str, optional): Trace specific history variables. Defaults to None.
             env (dict, optional): Environment variables. Defaults to os.environ.copy().
+            cache (bool, optional): Look up the effective configuration of the project in the run cache and, if the same
+                                    configuration already finished, return its result without running MESA.
+                                    Finished runs are added to the cache. Defaults to False.
+                                    The record of a cached run, including its LOGS location, is kept in `self.cached_run`.
+            cache_dir (str, optional): Directory of the run cache. Defaults to None, using the MESA-PORT cache directory.
 
         Raises:
             Exception: If the project is not made yet.
@@ -185,6 +193,14 @@ class ProjectOps:
         if trace is not None:
             ops_helper.setup_trace(trace, self.work_dir)
         ops_helper.check_exists(self.exists, self.projName)
+        self.cached_run = None
+        if cache:
+            fingerprint = run_cache.fingerprint(self.work_dir, astero=self.astero, binary=self.binary)
+            record = run_cache.lookup(fingerprint, cache_dir)
+            if record is not None:
+                self.cached_run = record
+                print(f"Found a finished run with the same configuration, not running again.\nLOGS: {', '.join(record['logs'])}\n")
+                return record["termination_code"], record["age"]
         if logging:
             runlog = os.path.join(self.work_dir, "run.log")
         else:
@@ -209,6 +225,9 @@ class ProjectOps:
                 termination_code, age = res
                 if age is not None:
                     print("Run successful.\n")
+                    if cache:
+                        run_cache.record(fingerprint, self.work_dir, termination_code, age,
+                                         run_cache.logsDirs(self.work_dir, binary=self.binary), cache_dir)
                     return termination_code, age
                 else:
                     print("Run unsuccessful.\n")
@@ -254,30 +273,17 @@ class ProjectOps:
                     res = ops_helper.run_subprocess(commands=f'./re', wdir=self.work_dir, 
                             silent=silent, runlog=runlog, status=status_, trace=trace, env=env)
         else:
-            if self.binary:
-                if target == 'primary':
-                    photo_path = os.path.join(self.work_dir, "photos1", photo)
-                elif target == 'secondary':
-                    photo_path = os.path.join(self.work_dir, "photos2", photo)
-                else:
-                    raise ValueError('''Invalid input for argument 'target'.  
-                                    Please use 'primary' or 'secondary' ''')
-            else:
-                photo_path = os.path.join(self.work_dir, "photos", photo)
-                
-            if not os.path.isfile(photo_path):
-                raise FileNotFoundError(f"Photo '{photo}' could not be exists.")
+            ops_helper.check_photo(self.work_dir, photo, binary=self.binary, target=target)
+            if silent not in [True, False]:
+                raise ValueError("Invalid input for argument 'silent'.")
             else:
-                if silent not in [True, False]:
-                    raise ValueError("Invalid input for argument 'silent'.")
+                if parallel:
+                    res = ops_helper.run_subprocess(commands=f'./re {photo}', wdir=self.work_dir, 
+                            silent=silent, runlog=runlog, parallel=True, trace=trace, env=env)
                 else:
-                    if parallel:
+                    with status.Status(f"[b i  cyan3]Resuming run from photo {photo}.\nRunning...", spinner="moon") as status_:
                         res = ops_helper.run_subprocess(commands=f'./re {photo}', wdir=self.work_dir, 
-                                silent=silent, runlog=runlog, parallel=True, trace=trace, env=env)
-                    else:
-                        with status.Status(f"[b i  cyan3]Resuming run from photo {photo}.\nRunning...", spinner="moon") as status_:
-                            res = ops_helper.run_subprocess(commands=f'./re {photo}', wdir=self.work_dir, 
-                                    silent=silent, runlog=runlog, status=status_, trace=trace, env=env)
+                                silent=silent, runlog=runlog, status=status_, trace=trace, env=env)
         if res is False:
             raise Exception("Resume from photo failed! Check runlog.")
         else:
@@ -290,15 +296,262 @@ class ProjectOps:
                 return termination_code, None
 
         
+    async def run_async(self, silent=True, logging=True, env=None):
+        """
+        Runs the project as a coroutine, supervised from the asyncio event loop.
+        Many projects can be run concurrently from one thread, e.g.
+        `asyncio.run(asyncio.gather(*(proj.run_async() for proj in projects)))`.
+
+        Args:
+            silent (bool, optional): Run the command silently. Defaults to True.
+            logging (bool, optional): Log the run. Defaults to True.
+            env (dict, optional): Environment variables. Defaults to None, using the current environment.
+
+        Raises:
+            Exception: If the project is not made yet.
+            Exception: If the run fails.
+
+        Returns: (If run is successful)
+            termination_code (str): Termination code.
+            age (float): Age of the star in years.
+        """
+        ops_helper.check_exists(self.exists, self.projName)
+        if not os.path.exists(os.path.join(self.work_dir, "star")) and \
+            not os.path.exists(os.path.join(self.work_dir, "binary")):
+            raise Exception("Aborting! Run 'make()' first.")
+        runlog = os.path.join(self.work_dir, "run.log") if logging else os.devnull
+        res = await supervisor.run_mesa('./rn', self.work_dir, runlog=runlog, env=env, silent=silent)
+        if res is False:
+            raise Exception("Run failed! Check runlog.")
+        termination_code, age = res
+        if age is not None:
+            print("Run successful.\n")
+        else:
+            print("Run unsuccessful.\n")
+        return termination_code, age
+
+
+    async def resume_async(self, photo=None, target=None, silent=True, logging=True, env=None):
+        """
+        Resumes the run from a given photo as a coroutine, supervised from the asyncio event loop.
+
+        Args:
+            photo (str, optional): Photo name from which the run is to be resumed. 
+                                If None, the last photo is used. Defaults to None.
+            target (str, optional): For binaries, 'primary' or 'secondary'. Defaults to None.
+            silent (bool, optional): Run the command silently. Defaults to True.
+            logging (bool, optional): Log the run. Defaults to True.
+            env (dict, optional): Environment variables. Defaults to None, using the current environment.
+
+        Raises:
+            FileNotFoundError: If the photo does not exist.
+            Exception: If the run fails.
+
+        Returns: (If run is successful)
+            termination_code (str): Termination code.
+            age (float): Age of the star in years.
+        """
+        ops_helper.check_exists(self.exists, self.projName)
+        runlog = os.path.join(self.work_dir, "run.log") if logging else os.devnull
+        if photo is None:
+            commands = './re'
+        else:
+            ops_helper.check_photo(self.work_dir, photo, binary=self.binary, target=target)
+            commands = f'./re {photo}'
+        res = await supervisor.run_mesa(commands, self.work_dir, runlog=runlog, env=env, silent=silent)
+        if res is False:
+            raise Exception("Resume from photo failed! Check runlog.")
+        termination_code, age = res
+        if age is not None:
+            print("Run successful.\n")
+        else:
+            print("Run unsuccessful.\n")
+        return termination_code, age
+
+
+    async def run_gyre_async(self, gyre_in, files='all', wdir=None, data_format="GYRE", target=None, logging=True,
+                             logfile="gyre.log", max_concurrent=None, gyre_input_params=None, env=None,
+                             silent=True, write_detail_output=False):
+        """
+        Runs GYRE on profiles as a coroutine, with all GYRE runs supervised from the asyncio event loop.
+
+        Arguments:
+            gyre_in (str): GYRE input file, used as the template of every profile's input file.
+            files (str, list of strings or ProfileSelector, optional): Profile files to be processed by GYRE,
+                                            or a ProfileSelector that selects them. Defaults to 'all'.
+            wdir (str, optional): Directory with the profiles. Defaults to None and uses the LOGS directory.
+            data_format (str, optional): Data format of the profiles. Defaults to "GYRE".
+            target (str, optional): For binaries, 'primary' or 'secondary'. Defaults to None.
+            logging (bool, optional): Log the output. Defaults to True.
+            logfile (str, optional): Log file name. Defaults to "gyre.log".
+            max_concurrent (int, optional): Maximum number of GYRE runs at once.
+                                            Defaults to None, using the number of cores divided by OMP_NUM_THREADS.
+            gyre_input_params (dict or list of dicts, optional): GYRE input parameters, for all profiles
+                                                                 or one dict per profile. Defaults to None.
+            env (dict, optional): Environment variables. Defaults to None, using the current environment.
+            silent (bool, optional): Run the commands silently. Defaults to True.
+            write_detail_output (bool, optional): Write GYRE detail output files. Defaults to False.
+
+        Raises:
+            FileNotFoundError: If GYRE_DIR is not set.
+            ValueError: If no profiles are found or selected.
+
+        Returns:
+            dict: {profile file: True if GYRE succeeded, else False}.
+        """
+        if 'GYRE_DIR' not in os.environ:
+            raise FileNotFoundError("GYRE_DIR is not set in your enviroment. Be sure to set it properly!!")
+        gyre_ex = os.path.join(os.environ['GYRE_DIR'], "bin", "gyre")
+        gyre_in = os.path.abspath(gyre_in)
+        LOGS_dir = ops_helper.gyre_logs_dir(self.work_dir, self.binary, target, 
+                                            os.path.abspath(wdir) if wdir is not None else None)
+        runlog = os.path.join(self.work_dir if wdir is None else os.path.abspath(wdir), logfile) if logging else os.devnull
+        if files == 'all':
+            files = ops_helper.find_profiles(LOGS_dir, data_format)
+        elif isinstance(files, ProfileSelector):
+            files = files.resolve(LOGS_dir, data_format)
+            if len(files) == 0:
+                raise ValueError("No profiles match the selection.")
+        elif isinstance(files, str):
+            files = [files]
+        if not isinstance(gyre_input_params, list):
+            gyre_input_params = [gyre_input_params] * len(files)
+        if max_concurrent is None:
+            max_concurrent = max(1, psutil.cpu_count(logical=True)//int(os.environ.get('OMP_NUM_THREADS', 1)))
+        os.environ['HDF5_USE_FILE_LOCKING'] = 'FALSE'
+        ## Runs start in order as slots free up, so the most expensive profiles go first
+        costs, _, _ = scheduler.estimateCosts(LOGS_dir, files, data_format, scheduler.loadHistory(LOGS_dir))
+        order = scheduler.longestFirst(costs)
+        results = await supervisor.gather_bounded(
+            (supervisor.run_gyre(gyre_ex, LOGS_dir, file, gyre_in, data_format, params, runlog=runlog, env=env,
+                                 silent=silent, write_detail_output=write_detail_output)
+             for file, params in ((files[i], gyre_input_params[i]) for i in order)), limit=max_concurrent)
+        results = dict(sorted(zip(order, results)))
+        results = {files[i]: ok for i, ok in results.items()}
+        failed = [file for file, ok in results.items() if not ok]
+        if failed:
+            print(f"GYRE failed for {len(failed)} of {len(files)} profiles: {', '.join(failed)}")
+        else:
+            print("GYRE run complete!\n")
+        return results
+
+
+    def runWithGyre(self, gyre_in, target=None, data_format="GYRE", n_cores=None, gyre_input_params=None,
+                    silent=True, logging=True, logfile="gyre.log", trace=None, env=os.environ.copy(),
+                    write_detail_output=False, poll_interval=1.0):
+        """
+        Runs the project and GYRE at the same time: while MESA evolves the star, every profile it finishes
+        writing is handed to a pool of GYRE workers right away, instead of waiting for the evolution to end.
+        Profiles are picked up from LOGS/profiles.index once their pulsation data file (e.g. profileN.data.GYRE)
+        stops changing. Set write_pulse_data_with_profile and pulse_data_format in the inlist.
+
+        Arguments:
+            gyre_in (str): GYRE input file, used as the template of every profile's input file.
+            target (str, optional): For binaries, the star to run GYRE on, 'primary' or 'secondary'. Defaults to None.
+            data_format (str, optional): Pulsation data format written by MESA. Defaults to "GYRE".
+            n_cores (int, optional): Number of cores for the GYRE workers. Defaults to None, using all cores.
+            gyre_input_params (dict, optional): GYRE input parameters applied to every profile. Defaults to None.
+            silent (bool, optional): Run the commands silently. Defaults to True.
+            logging (bool, optional): Log the output. Defaults to True.
+            logfile (str, optional): GYRE log file name. Defaults to "gyre.log".
+            trace (list of str, optional): Trace specific history variables. Defaults to None.
+            env (dict, optional): Environment variables. Defaults to os.environ.copy().
+            write_detail_output (bool, optional): Write GYRE detail output files. Defaults to False.
+            poll_interval (float, optional): Seconds between checks for new profiles. Defaults to 1.0.
+
+        Raises:
+            ValueError: If the input for argument 'target' or 'gyre_input_params' is invalid.
+            Exception: If the MESA run fails. Already started GYRE runs are completed first.
+
+        Returns:
+            termination_code (str): Termination code of the MESA run.
+            age (float): Age of the star in years.
+            results (dict): {profile file: True if GYRE succeeded, else False}, in order of completion.
+        """
+        ops_helper.check_exists(self.exists, self.projName)
+        if 'GYRE_DIR' not in os.environ:
+            raise FileNotFoundError("GYRE_DIR is not set in your enviroment. Be sure to set it properly!!")
+        gyre_ex = os.path.join(os.environ['GYRE_DIR'], "bin", "gyre")
+        gyre_in = os.path.abspath(gyre_in)
+        if gyre_input_params is not None and not isinstance(gyre_input_params, dict):
+            raise ValueError("gyre_input_params must be a dict, applied to every profile.")
+        if self.binary:
+            if target not in ['primary', 'secondary']:
+                raise ValueError("""Invalid input for argument 'target'.  
+                                Please use primary or secondary""")
+            LOGS_dir = run_cache.logsDirs(self.work_dir, binary=True)[0 if target == 'primary' else 1]
+        else:
+            LOGS_dir = run_cache.logsDirs(self.work_dir)[0]
+        runlog = os.path.join(self.work_dir, logfile) if logging else os.devnull
+        n_cores = n_cores if n_cores is not None else psutil.cpu_count(logical=True)
+        n_processes = max(1, n_cores//int(os.environ.get('OMP_NUM_THREADS', 1)))
+        os.environ['HDF5_USE_FILE_LOCKING'] = 'FALSE'
+
+        ## Profiles older than this are left over from earlier runs
+        since = time.time_ns() - 1_000_000_000
+        outcome = {}
+        def evolve():
+            try:
+                outcome["result"] = self.run(silent=silent, logging=logging, parallel=True, trace=trace, env=env)
+            except Exception as e:
+                outcome["error"] = e
+        mesa = threading.Thread(target=evolve, daemon=True)
+        mesa.start()
+
+        def profiles():
+            ## Profiles as MESA finishes writing them, None while there is none ready yet
+            seen = {}
+            while True:
+                finished = not mesa.is_alive()
+                ready = ops_helper.ready_profiles(LOGS_dir, data_format, since, seen, final=finished)
+                for filename in ready:
+                    yield (filename, gyre_input_params)
+                if finished:
+                    return
+                if not ready:
+                    mesa.join(poll_interval)
+                    yield None
+
+        gyre_task = functools.partial(ops_helper.gyre_task, commands=f'{gyre_ex} gyre.in', wdir=LOGS_dir,
+                                      silent=silent, runlog=runlog, data_format=data_format, parallel=True,
+                                      gyre_in=gyre_in, env=env, write_detail_output=write_detail_output)
+        results = {}
+        for task in execute(gyre_task, profiles(), backend="thread", workers=n_processes,
+                            description="[b i cyan3]Running MESA and GYRE..."):
+            if task.error is not None:
+                print(task.error.traceback)
+            results[task.task[0]] = task.error is None and task.result is not False
+        mesa.join()
+
+        filenames = glob.glob(os.path.join(LOGS_dir, "gyreprofile*.log"))
+        with open(runlog, 'a+') as outfile:
+            for fname in filenames:
+                with open(fname) as infile:
+                    for line in infile:
+                        outfile.write(line)
+                os.remove(fname)
+        failed = [filename for filename, ok in results.items() if not ok]
+        print(f"GYRE run complete for {len(results) - len(failed)} of {len(results)} profiles.\n")
+        if failed:
+            print(f"GYRE failed for {', '.join(failed)}. Check runlog.")
+        if "error" in outcome:
+            raise outcome["error"]
+        termination_code, age = outcome["result"]
+        return termination_code, age, results
+
+
     def runGyre(self, gyre_in, files='all', wdir=None, data_format="GYRE", silent=True, target=None, logging=True, logfile="gyre.log", 
-                    parallel=False, n_cores=None, gyre_input_params=None, env=os.environ.copy(), write_detail_output=False):
+                    parallel=False, n_cores=None, gyre_input_params=None, env=os.environ.copy(), write_detail_output=False,
+                    incremental=False, force=False, backend=None, schedule="longest", continuation=False,
+                    continuation_padding=scan_continuation.PADDING):
         """
         Runs GYRE.
 
         Arguments:
             gyre_in (str): GYRE input file.
-            files (str or list of strings, optional): Profile files in the LOGS directory 
-                                            to be processed by GYRE. Defaults to 'all'.
+            files (str, list of strings or ProfileSelector, optional): Profile files in the LOGS directory 
+                                            to be processed by GYRE, or a ProfileSelector that selects them
+                                            by criteria on their history and profiles.index columns. Defaults to 'all'.
             wdir (str, optional): Working directory. Defaults to None and uses the project directory.
             silent (bool, optional): Run the command silently. Defaults to True.
             target (str, optional): Target star. Defaults to None.
@@ -314,10 +567,29 @@ class ProjectOps:
                                                                 list of profile files. len(list of dicts) must be
                                                                 equal to len(list of profile files). Defaults to None.
             env (dict, optional): Environment variables. Defaults to os.environ.copy().
+            incremental (bool, optional): Only run the profiles that are new, changed or failed since the last
+                                          incremental run, as recorded in the gyre_manifest.jsonl file of the
+                                          profiles directory. Defaults to False.
+            force (bool, optional): With incremental, run all profiles anyway and record them. Defaults to False.
+            backend (str, optional): With parallel, run the GYRE tasks from a pool of "thread" or "process" workers,
+                                     see `executor.execute`. Defaults to None, using threads.
+            schedule (str, optional): With parallel, the order in which profiles are dispatched to the workers.
+                                      "longest" dispatches the most expensive profiles first, estimated from their
+                                      number of zones and the runtimes recorded in the gyre_runtimes.json file of
+                                      the profiles directory. "order" keeps the order of the files.
+                                      Defaults to "longest".
+            continuation (bool, optional): Narrow the &scan range of each profile to the modes found for the previous
+                                           profile, padded by continuation_padding, and run the profile again on the
+                                           full range if modes go missing. The frequencies of the summary file must be
+                                           in the units and frame of the &scan range. With parallel, the profiles are
+                                           split into one chain of consecutive profiles per worker. Defaults to False.
+            continuation_padding (float, optional): Relative padding of the narrowed range. Defaults to 0.1.
         Raises:
             FileNotFoundError: If the GYRE input file does not exist.
             ValueError: If the input for argument 'silent' is invalid.
             ValueError: If the input for argument 'files' is invalid.
+            ValueError: If no profiles match a ProfileSelector.
+            ValueError: If the input for argument 'schedule' is invalid.
         """
         if wdir is not None:
             wdir = os.path.abspath(wdir)
@@ -327,16 +599,7 @@ class ProjectOps:
             gyre_ex = os.path.join(os.environ['GYRE_DIR'], "bin", "gyre")
         else:
             raise FileNotFoundError("GYRE_DIR is not set in your enviroment. Be sure to set it properly!!")
-        if self.binary:
-            if target == 'primary':
-                LOGS_dir = os.path.join(self.work_dir, "LOGS1") if wdir is None else wdir
-            elif target == 'secondary':
-                LOGS_dir = os.path.join(self.work_dir, "LOGS2") if wdir is None else wdir
-            else:
-                raise ValueError("""Invalid input for argument 'star'.  
-                                Please use primary or secondary""")
-        else:
-            LOGS_dir = os.path.join(self.work_dir, "LOGS") if wdir is None else wdir
+        LOGS_dir = ops_helper.gyre_logs_dir(self.work_dir, self.binary, target, wdir)
 
         if wdir is None:
             wdir = self.work_dir
@@ -349,19 +612,17 @@ class ProjectOps:
         
         if not silent in [True, False]:
             raise ValueError("Invalid input for argument 'silent'")
+        if schedule not in ("longest", "order"):
+            raise ValueError("Invalid input for argument 'schedule'. Use 'longest' or 'order'.")
+        if isinstance(files, ProfileSelector):
+            files = files.resolve(LOGS_dir, data_format)
+            if len(files) == 0:
+                raise ValueError("No profiles match the selection.")
 
         if files == 'all' or isinstance(files, list) or isinstance(files, str):
             ## ALL FILES
             if files == 'all':
-                files = []
-                try:
-                    files = sorted(glob.glob(os.path.join(LOGS_dir, f"*.{data_format}")), 
-                                key=lambda x: int(os.path.basename(x).split('.')[0].split('profile')[1]))
-                except ValueError:
-                    files = sorted(glob.glob(os.path.join(LOGS_dir, f"*.{data_format}")))
-                files = [file.split('/')[-1] for file in files]
-                if len(files) == 0:
-                    raise ValueError(f"No {data_format} files found in LOGS directory.")
+                files = ops_helper.find_profiles(LOGS_dir, data_format)
                     
             ## SPECIFIC FILES
             elif type(files) == list or type(files) == str:
@@ -374,65 +635,98 @@ class ProjectOps:
                 #     for file in files:
                 #         if not os.path.isfile(os.path.join(LOGS_dir, file)) and not os.path.isfile(file):
                 #             raise FileNotFoundError(f"File '{file}' does not exist.")
+
+            ## One dict of GYRE input parameters (or None) per profile
+            if not isinstance(gyre_input_params, list):
+                gyre_input_params = [gyre_input_params] * len(files)
+            manifest, pending = None, None
+            if incremental:
+                manifest = gyre_manifest.GyreManifest(LOGS_dir)
+                todo = []
+                for file, params in zip(files, gyre_input_params):
+                    upToDate, pending_ = manifest.check(file, gyre_in, data_format, params, write_detail_output)
+                    if force or not upToDate:
+                        todo.append((file, params, pending_))
+                if len(todo) < len(files):
+                    print(f"Skipping {len(files) - len(todo)} profiles with up-to-date GYRE outputs.")
+                files = [file for file, _, _ in todo]
+                gyre_input_params = [params for _, params, _ in todo]
+                pending = {file: pending_ for file, _, pending_ in todo}
                         
             with open(f'{wdir}/gyre.log', 'a+') as f:
                     f.write(f"Total {len(files)} profiles to be processed by GYRE.\n\n")
             if parallel:
-                gyre_input_params = gyre_input_params if gyre_input_params is not None else repeat(None)
                 os.environ['HDF5_USE_FILE_LOCKING'] = 'FALSE'
-                ## copy gyre.in to gyre1.in, gyre2.in, etc. for parallel runs
-                for i, file in enumerate(files):
-                    num = file.split(".")[0]
-                    new_gyre_in = os.path.join(wdir, f"gyre{num}.in")
-                    shutil.copyfile(gyre_in, new_gyre_in)
-                # commands, wdir, 
-                # silent=True, runlog='', 
-                # status=None, filename="", 
-                # data_format="FGONG", parallel=False, gyre_in=None, 
-                # gyre_input_params=None, trace=None, env=None
-                args = (repeat(f'{gyre_ex} gyre.in'), repeat(LOGS_dir),
-                        repeat(silent), repeat(runlog),
-                        repeat(None), files, repeat(data_format),
-                        repeat(True), repeat(gyre_in),
-                        gyre_input_params, repeat(None), 
-                        repeat(os.environ.copy()), repeat(write_detail_output))
-                if n_cores is None:
-                    n_cores = psutil.cpu_count(logical=True) 
-                    Pool = mp.Pool
-                    with progress.Progress(*progress_columns) as progressbar:
-                        task = progressbar.add_task("[b i cyan3]Running GYRE...", total=len(files))
-                        n_processes = (n_cores//int(os.environ['OMP_NUM_THREADS']))
-                        with Pool(n_processes) as pool:
-                            gyre_in = os.path.abspath(gyre_in)
-                            try:
-                                for _ in pool.istarmap(ops_helper.run_subprocess, zip(*args)):
-                                    progressbar.advance(task)
-                            except Exception as e:
-                                print(traceback.format_exc())
-                                print(f"Error: {e}")
-                                pool.terminate()
+                backend = backend if backend is not None else "thread"
+                n_cores = n_cores if n_cores is not None else psutil.cpu_count(logical=True)
+                workers = max(1, n_cores//int(os.environ.get('OMP_NUM_THREADS', 1)))
+            else:
+                backend, workers = "serial", 1
+            history = scheduler.loadHistory(LOGS_dir)
+            costs, sizes, calibrated = scheduler.estimateCosts(LOGS_dir, files, data_format, history)
+            if continuation:
+                if files and scan_continuation.scan_range(GyreAccess().render(gyre_in, files[0], data_format,
+                                                           gyre_input_params[0], write_detail_output)) is None:
+                    print("Frequency-scan continuation needs summary frequencies in the units and frame of the "
+                          "&scan range (freq_units and freq_frame). Scanning the full range.")
+                ## Consecutive profiles run in order in the same worker, each narrowed to the previous one's modes
+                chains = scheduler.contiguousChains(costs, workers)
+            elif parallel and schedule == "longest":
+                ## The most expensive profiles start first, so that the batch does not end
+                ## with a few large late-stage profiles running while the other workers are idle
+                order = scheduler.longestFirst(costs)
+                files, gyre_input_params, costs, sizes = ([seq[i] for i in order]
+                                                          for seq in (files, gyre_input_params, costs, sizes))
+            ## Each parallel task renders its own gyre<profile>.in from gyre_in in a single write.
+            ## Process workers get the environment once, from the initializer, instead of with every task.
+            task_kwargs = dict(commands=f'{gyre_ex} gyre.in', wdir=LOGS_dir, silent=silent, runlog=runlog,
+                               data_format=data_format, parallel=parallel, gyre_in=gyre_in,
+                               write_detail_output=write_detail_output)
+            if continuation:
+                gyre_task = functools.partial(scan_continuation.run_chain, padding=continuation_padding, **task_kwargs)
+                tasks = [([files[i] for i in chain], [gyre_input_params[i] for i in chain]) for chain in chains]
+                predicted = (scheduler.predictMakespan([sum(costs[i] for i in chain) for chain in chains], workers)
+                             if calibrated else None)
+            else:
+                gyre_task = functools.partial(ops_helper.gyre_task, **task_kwargs)
+                tasks = list(zip(files, gyre_input_params))
+                predicted = scheduler.predictMakespan(costs, workers) if calibrated else None
+            position = {file: i for i, file in enumerate(files)}
+            failed = []
+            scans = []
+            start = time.perf_counter()
+            for outcome in execute(gyre_task, tasks, backend=backend, workers=workers,
+                                   initargs=(os.environ.copy(),) if backend == "process" else (),
+                                   description="[b i cyan3]Running GYRE..."):
+                if outcome.error is not None:
+                    print(outcome.error.traceback)
+                ## The profiles of a task are read from the task itself
+                if continuation:
+                    task_files = outcome.task[0]
+                    results = outcome.result if outcome.error is None else [(False, None, None)]*len(task_files)
+                else:
+                    task_files = [outcome.task[0]]
+                    results = [(outcome.error is None and outcome.result is not False, outcome.elapsed, None)]
+                for file, (success, runtime, scan) in zip(task_files, results):
+                    index = position[file]
+                    scans.append(scan)
+                    if not success:
+                        failed.append(file)
+                    elif sizes[index] is not None:
+                        history[file] = {"runtime": runtime, "size": sizes[index]}
+                    if manifest is not None:
+                        manifest.record(pending[file], success)
+            elapsed = time.perf_counter() - start
+            if continuation and files:
+                print(f"Frequency-scan continuation: {scans.count('narrowed')} of {len(files)} profiles scanned "
+                      f"a narrowed range, {scans.count('fallback')} fell back to the full range.")
+            if files:
+                scheduler.saveHistory(LOGS_dir, history)
+                if predicted is not None:
+                    print(f"GYRE batch time: {elapsed:.1f} s, predicted {predicted:.1f} s.")
                 else:
-                    try:
-                        from concurrent.futures import ThreadPoolExecutor
-                        n_processes = (n_cores//int(os.environ['OMP_NUM_THREADS']))
-                        with ThreadPoolExecutor(max_workers=n_processes) as executor:
-                            gyre_in = os.path.abspath(gyre_in)
-                            try:
-                                executor.map(ops_helper.run_subprocess, *args)
-                            except Exception as e:
-                                print(traceback.format_exc())
-                                print(f"Error: {e}")
-                                executor.shutdown(wait=False)
-                    except Exception as e:
-                        filenames = glob.glob(os.path.join(LOGS_dir, f"gyreprofile*.log"))
-                        with open(runlog, 'a+') as outfile:
-                            for fname in filenames:
-                                with open(fname) as infile:
-                                    for line in infile:
-                                        outfile.write(line)
-                                os.remove(fname)
-                        print(traceback.format_exc())
-                        print(f"Error: {e}")
+                    print(f"GYRE batch time: {elapsed:.1f} s.")
+            if parallel:
                 filenames = glob.glob(os.path.join(LOGS_dir, f"gyreprofile*.log"))
                 with open(runlog, 'a+') as outfile:
                     for fname in filenames:
@@ -440,14 +734,11 @@ class ProjectOps:
                             for line in infile:
                                 outfile.write(line)
                         os.remove(fname)
-                res = True
-            else:
-                for i, file in enumerate(files):
-                    gyre_input_params_i = gyre_input_params[i] if gyre_input_params is not None else None
-                    res = ops_helper.run_subprocess(f'{gyre_ex} gyre.in', wdir=LOGS_dir, filename=file,
-                        silent=silent, runlog=runlog, status=None, gyre_in=gyre_in, 
-                        data_format=data_format, gyre_input_params=gyre_input_params_i, 
-                        write_detail_output=write_detail_output)
+            if failed:
+                print(f"GYRE failed for {len(failed)} of {len(files)} profiles: {', '.join(failed)}")
+            res = not failed
+            if manifest is not None:
+                manifest.compact()
         else:
             raise ValueError("Invalid input for argument 'files'")
         if res is False:
@@ -455,3 +746,32 @@ class ProjectOps:
         else:
             print("GYRE run complete!\n")
         return res
+
+
+    def storeGyre(self, store=None, target=None, wdir=None, kind="ad", n_cores=None, backend="process"):
+        """
+        Ingests the GYRE summary files of the project into a columnar store, see `gyre_store.GyreStore`.
+        Only summary files that are new or changed since the last ingest are parsed.
+
+        Arguments:
+            store (str, optional): The store directory. Defaults to None, using gyre_store (or gyre_store_nad)
+                                   in the profiles directory. Pass the same store for several projects,
+                                   e.g. a grid, to ingest them all into one store.
+            target (str, optional): For binaries, 'primary' or 'secondary'. Defaults to None.
+            wdir (str, optional): Directory with the summary files. Defaults to None and uses the LOGS directory.
+            kind (str, optional): "ad" for the adiabatic summaries or "nad" for the non-adiabatic ones. Defaults to "ad".
+            n_cores (int, optional): Number of workers parsing summary files. Defaults to None, using all cores.
+            backend (str, optional): "process", "thread" or "serial". Defaults to "process".
+
+        Returns:
+            GyreStore: The store, with its columns memory-mapped.
+        """
+        LOGS_dir = ops_helper.gyre_logs_dir(self.work_dir, self.binary, target,
+                                            os.path.abspath(wdir) if wdir is not None else None)
+        if store is None:
+            store = os.path.join(LOGS_dir, "gyre_store" if kind == "ad" else f"gyre_store_{kind}")
+        gyre_store = GyreStore(store)
+        parsed, reused, removed = gyre_store.ingest(LOGS_dir, kind=kind, n_cores=n_cores, backend=backend)
+        print(f"GYRE store: {parsed} summaries ingested, {reused} unchanged, {removed} removed. "
+              f"{len(gyre_store)} modes in {gyre_store.path}.")
+        return gyre_store
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import glob
+import hashlib
+
+from ..Access import MesaAccess, MesaBinaryAccess
+from ..Access.cache import cacheDir, mesaVersion
+from ..Access.access_helper import toPythonType, getFilename
+from ..Access.support.utils import atomicWrite
+
+"""
+This module implements a content-addressed cache of finished MESA runs.
+
+A run is identified by a fingerprint of its effective configuration: the inlists merged with the MESA defaults,
+the top level `inlist` file, the history and profile columns files, the Fortran sources in `src` and the MESA version.
+Results of finished runs are stored as small JSON records, named by fingerprint, in a local result store
+(by default `runs` in the cache directory of `Access.cache.cacheDir`). Files are hashed by content and a name
+relative to the project, so the same configuration hits in another directory. A record also holds the size and
+mtime of the history.data and profiles.index files of its LOGS directories, and is only used while they are unchanged,
+i.e. until another run overwrites the LOGS.
+
+Methods:
+    fingerprint(work_dir, astero=False, binary=False): Returns the fingerprint of a project's configuration.
+    lookup(fingerprint_, store=None): Returns the stored result of a fingerprint, if its LOGS outputs are unchanged.
+    record(fingerprint_, work_dir, termination_code, age, logs, store=None): Stores the result of a finished run.
+"""
+
+def storeDir(store=None):
+    """Returns the directory of the result store."""
+    return store if store is not None else os.path.join(cacheDir(), "runs")
+
+
+## Output files of a LOGS directory whose signature is recorded with a run
+LOGS_OUTPUTS = ("history.data", "profiles.index")
+
+
+def hashFile(path, digest, name):
+    """Adds a name and the content of a file to a hash. Missing files are hashed as missing.
+
+    Args:
+        path (str): Path to the file.
+        digest (hashlib hash): The hash.
+        name (str): Name of the file in the hash, independent of where the project is,
+                    e.g. its path relative to the project directory.
+    """
+    digest.update(f"<{name}>".encode())
+    try:
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        digest.update(b"<missing>")
+
+
+def effectiveConfig(access):
+    """Returns the inlist values of a MesaAccess target, with the extra inlists resolved, merged with the defaults,
+    as sorted (parameter, value) pairs."""
+    config = {}
+    for section in access.sections:
+        for parameter, value in access.defaultsDict[section].items():
+            config.setdefault(parameter, value)
+    access.generateDicts()
+    for section in access.sections:
+        filename = getFilename(access.astero, access.binary, section, access.inlist_filenames)
+        if not os.path.exists(os.path.join(access.projectDir, filename)):
+            continue
+        ## In MESA read order, so that extra inlists override the files including them
+        for _, document in access.readOrder(section, filename):
+            section_ = document.section(section)
+            if section_ is not None:
+                config.update({name: entry.value for name, entry in section_.entries.items()})
+    merged = []
+    for parameter, value in config.items():
+        try:
+            value = toPythonType(value)
+        except (AttributeError, IndexError, ValueError):
+            pass
+        merged.append((parameter, repr(value)))
+    return sorted(merged)
+
+
+def columnsFile(access, parameter, default):
+    """Returns the path of the history or profile columns file used by MESA."""
+    try:
+        name = access.get(parameter)
+    except KeyError:
+        name = None
+    if not name:
+        return os.path.join(access.mesaDir, "star", "defaults", default)
+    return os.path.join(access.projectDir, name)
+
+
+def fingerprint(work_dir, astero=False, binary=False):
+    """Returns the fingerprint of the effective configuration of a project.
+
+    Args:
+        work_dir (str): Path to the project directory.
+        astero (bool, optional): True for an asteroseismic project. Defaults to False.
+        binary (bool, optional): True for a binary star system. Defaults to False.
+
+    Returns:
+        str: A hex digest identifying the configuration.
+    """
+    if binary:
+        targets = list(MesaBinaryAccess(work_dir).access.values())
+        stars = targets[1:]
+    else:
+        targets = stars = [MesaAccess(work_dir, astero=astero)]
+    digest = hashlib.sha256()
+    digest.update(f"MESA {mesaVersion(targets[0].mesaDir)}\n".encode())
+    for access in targets:
+        digest.update(f"[{access.target}]\n".encode())
+        for parameter, value in effectiveConfig(access):
+            digest.update(f"{parameter}={value}\n".encode())
+    for access in stars:
+        hashFile(columnsFile(access, "history_columns_file", "history_columns.list"), digest, f"{access.target} history columns")
+        hashFile(columnsFile(access, "profile_columns_file", "profile_columns.list"), digest, f"{access.target} profile columns")
+    hashFile(os.path.join(work_dir, "inlist"), digest, "inlist")
+    for source in sorted(glob.glob(os.path.join(work_dir, "src", "*.f90"))):
+        hashFile(source, digest, os.path.relpath(source, work_dir))
+    return digest.hexdigest()
+
+
+def lookup(fingerprint_, store=None):
+    """Returns the stored result of a run with the given fingerprint.
+
+    Args:
+        fingerprint_ (str): The fingerprint of the configuration.
+        store (str, optional): Directory of the result store. Defaults to None, using the cache directory.
+
+    Returns:
+        dict: The stored record with keys termination_code, age, work_dir, logs, outputs and time, or None if there
+              is no record or the outputs of its LOGS directories changed since, e.g. overwritten by another run.
+    """
+    try:
+        with open(os.path.join(storeDir(store), f"{fingerprint_}.json")) as file:
+            record_ = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not record_.get("logs") or not all(os.path.isdir(logs) for logs in record_["logs"]):
+        return None
+    if record_.get("outputs") != outputsSignature(record_["logs"]):
+        return None
+    return record_
+
+
+def record(fingerprint_, work_dir, termination_code, age, logs, store=None):
+    """Stores the result of a finished run.
+
+    Args:
+        fingerprint_ (str): The fingerprint of the configuration.
+        work_dir (str): Path to the project directory.
+        termination_code (str): Termination code of the run.
+        age (float): Age of the star in years.
+        logs (list): Paths to the LOGS directories written by the run.
+        store (str, optional): Directory of the result store. Defaults to None, using the cache directory.
+    """
+    store = storeDir(store)
+    os.makedirs(store, exist_ok=True)
+    logs = [os.path.abspath(logs_) for logs_ in logs]
+    record_ = {"termination_code": termination_code, "age": age, "work_dir": os.path.abspath(work_dir),
+               "logs": logs, "outputs": outputsSignature(logs), "time": time.time()}
+    atomicWrite(os.path.join(store, f"{fingerprint_}.json"), json.dumps(record_, indent=2))
+
+
+def outputsSignature(logs):
+    """Returns the size and mtime of the output files of LOGS directories, None for missing files.
+
+    Args:
+        logs (list): Paths to the LOGS directories.
+
+    Returns:
+        dict: {path: [size, mtime in ns]}.
+    """
+    signature = {}
+    for logs_ in logs:
+        for name in LOGS_OUTPUTS:
+            path = os.path.join(logs_, name)
+            try:
+                stat = os.stat(path)
+                signature[path] = [stat.st_size, stat.st_mtime_ns]
+            except OSError:
+                signature[path] = None
+    return signature
+
+
+def logsDirs(work_dir, binary=False):
+    """Returns the LOGS directories written by a run of the project."""
+    if binary:
+        candidates = [MesaBinaryAccess(work_dir).target(target) for target in ['primary', 'secondary']]
+        defaults = ["LOGS1", "LOGS2"]
+    else:
+        candidates, defaults = [MesaAccess(work_dir)], ["LOGS"]
+    logs = []
+    for access, default in zip(candidates, defaults):
+        try:
+            name = access.get("log_directory")
+        except KeyError:
+            name = None
+        logs.append(os.path.join(work_dir, name or default))
+    return logs
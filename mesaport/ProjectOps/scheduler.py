@@ -0,0 +1,149 @@
+import os
+import json
+import heapq
+import bisect
+from itertools import accumulate
+
+from ..Access.support.utils import atomicWrite
+
+"""
+This module implements the cost model and the longest-first scheduling of GYRE batches.
+
+The cost of running GYRE on a profile grows with its number of zones, read from the header of the profile file
+(or its file size if the header cannot be read). Runtimes of earlier runs are kept in `gyre_runtimes.json` in the
+profiles directory. A profile that ran before with the same number of zones is expected to take as long again;
+other profiles are estimated from the average runtime per zone of the recorded runs.
+Dispatching the most expensive profiles first keeps the workers busy until the end of the batch.
+
+Methods:
+    profileSize(path, data_format): Returns the number of zones of a profile file.
+    loadHistory(logs_dir): Returns the recorded runtimes of a profiles directory.
+    saveHistory(logs_dir, history): Writes the recorded runtimes of a profiles directory.
+    estimateCosts(logs_dir, files, data_format, history=None): Estimates the runtime of each profile.
+    longestFirst(costs): Returns the order in which to dispatch jobs, most expensive first.
+    predictMakespan(costs, workers): Predicts the batch time of jobs dispatched in order to a pool of workers.
+    contiguousChains(costs, chains): Splits jobs into contiguous chains of about equal cost.
+"""
+
+HISTORY = "gyre_runtimes.json"
+
+
+def profileSize(path, data_format):
+    """Returns the size of a profile as the number of zones in its header, or else its file size in bytes.
+
+    Args:
+        path (str): Path to the profile file.
+        data_format (str): "GYRE" (first header value) or "FGONG" (first value of the fifth line).
+
+    Returns:
+        int: The number of zones or the file size, None if the file does not exist.
+    """
+    try:
+        with open(path) as file:
+            if data_format == "GYRE":
+                return int(file.readline().split()[0])
+            elif data_format == "FGONG":
+                for _ in range(4):
+                    file.readline()
+                return int(file.readline().split()[0])
+    except OSError:
+        return None
+    except (ValueError, IndexError, UnicodeDecodeError):
+        pass
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def loadHistory(logs_dir):
+    """Returns the recorded runtimes of a profiles directory.
+
+    Returns:
+        dict: {profile file: {"runtime": seconds, "size": size from `profileSize`}}, empty if there is no record.
+    """
+    try:
+        with open(os.path.join(logs_dir, HISTORY)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def saveHistory(logs_dir, history):
+    """Writes the recorded runtimes of a profiles directory."""
+    atomicWrite(os.path.join(logs_dir, HISTORY), json.dumps(history, indent=1))
+
+
+def estimateCosts(logs_dir, files, data_format, history=None):
+    """Estimates the runtime of GYRE on each profile.
+
+    Args:
+        logs_dir (str): The profiles directory.
+        files (list): The profile files.
+        data_format (str): The data format of the profiles.
+        history (dict, optional): Recorded runtimes, as returned by `loadHistory`. Defaults to None.
+
+    Returns:
+        list, list, bool: The estimated cost of each profile, its size, and True if the costs are in seconds
+                          (calibrated from recorded runtimes) rather than relative sizes.
+    """
+    history = history or {}
+    sizes = [profileSize(os.path.join(logs_dir, file), data_format) for file in files]
+    recorded = [entry for entry in history.values() if entry.get("size") and entry.get("runtime") is not None]
+    rate = sum(entry["runtime"] for entry in recorded) / sum(entry["size"] for entry in recorded) if recorded else None
+    known = [size for size in sizes if size is not None]
+    typical = sum(known) / len(known) if known else 1
+    costs = []
+    for file, size in zip(files, sizes):
+        entry = history.get(file)
+        if entry is not None and size is not None and entry.get("size") == size and entry.get("runtime") is not None:
+            costs.append(entry["runtime"])
+        elif rate is not None:
+            costs.append((size if size is not None else typical) * rate)
+        else:
+            costs.append(size if size is not None else typical)
+    return costs, sizes, rate is not None
+
+
+def longestFirst(costs):
+    """Returns the indices of the jobs in the order to dispatch them, most expensive first.
+    Ties keep their original order."""
+    return sorted(range(len(costs)), key=lambda i: -costs[i])
+
+
+def predictMakespan(costs, workers):
+    """Predicts the batch time of jobs dispatched in the given order to a pool of workers,
+    each job going to the first worker that becomes free.
+
+    Args:
+        costs (list): The cost of each job, in dispatch order.
+        workers (int): Number of workers.
+
+    Returns:
+        float: The predicted batch time.
+    """
+    finish = [0.0] * max(1, min(workers, len(costs)))
+    for cost in costs:
+        heapq.heappush(finish, heapq.heappop(finish) + cost)
+    return max(finish) if costs else 0.0
+
+
+def contiguousChains(costs, chains):
+    """Splits jobs into contiguous chains of about equal total cost, e.g. to run consecutive profiles in one worker.
+
+    Args:
+        costs (list): The cost of each job, in order.
+        chains (int): Number of chains.
+
+    Returns:
+        list: The indices of the jobs of each chain, without empty chains.
+    """
+    cumulative = list(accumulate(costs))
+    total = cumulative[-1] if cumulative else 0
+    bounds = [0]
+    for k in range(1, chains):
+        ## First job that ends after k/chains of the total cost starts the next chain
+        bound = max(bounds[-1], min(len(costs), bisect.bisect_left(cumulative, total*k/chains) + 1))
+        bounds.append(bound)
+    bounds.append(len(costs))
+    return [list(range(start, end)) for start, end in zip(bounds, bounds[1:]) if end > start]
@@ -0,0 +1,182 @@
+import os
+
+import numpy as np
+
+from .ops_helper import scan_profiles
+
+"""
+This module defines the `ProfileSelector` class, which selects the profiles to run GYRE on
+by criteria on the history and profile columns of the models, instead of by file name.
+
+Every profile is joined by its model number with its row of `history.data` and its line of `profiles.index`
+(columns `model_number`, `priority` and `profile_number`). Only the history columns used by the criteria are read.
+Criteria are applied in the order they are added, e.g. a range of central hydrogen and then at most one model per
+Δage among the models in that range.
+
+Classes:
+    ProfileSelector: Selects profiles by criteria on their columns.
+
+Methods:
+    read_history(path, columns=None): Reads columns of a MESA history file.
+"""
+
+INDEX_COLUMNS = ("model_number", "priority", "profile_number")
+
+
+def read_history(path, columns=None):
+    """Reads columns of a MESA history file. Rows of models that were run again after a restart
+    from a photo are replaced by the rows of the new run, so model numbers increase strictly.
+
+    Args:
+        path (str): Path to the history file.
+        columns (list, optional): Names of the columns to read. Defaults to None, reading all columns.
+                                  The model_number column is always read.
+
+    Raises:
+        KeyError: If a column does not exist in the history file.
+
+    Returns:
+        dict: {column name: numpy array}.
+    """
+    with open(path) as file:
+        for _ in range(5):
+            file.readline()
+        names = file.readline().split()
+    columns = list(names) if columns is None else list(dict.fromkeys(["model_number", *columns]))
+    missing = [column for column in columns if column not in names]
+    if missing:
+        raise KeyError(f"Columns {', '.join(missing)} not found in {path}.")
+    data = np.loadtxt(path, skiprows=6, usecols=[names.index(column) for column in columns], ndmin=2)
+    history = dict(zip(columns, data.T))
+    models = history["model_number"]
+    if len(models) > 1:
+        ## A row is superseded if a later row has the same or a lower model number
+        later_min = np.minimum.accumulate(models[::-1])[::-1]
+        keep = np.append(models[:-1] < later_min[1:], True)
+        history = {column: values[keep] for column, values in history.items()}
+    return history
+
+
+class ProfileSelector:
+    def __init__(self, history="history.data"):
+        """Initializes the ProfileSelector class, with no criteria: all profiles are selected.
+
+        Args:
+            history (str, optional): Name of the history file in the LOGS directory. Defaults to "history.data".
+        """
+        self.history = history
+        self.steps = []
+
+
+    def where(self, column, low=None, high=None, func=None):
+        """Keeps the profiles whose column is between low and high (both included), and for which func is True.
+
+        Args:
+            column (str): A history column, or one of model_number, priority and profile_number.
+            low (float, optional): Lower bound. Defaults to None, without a lower bound.
+            high (float, optional): Upper bound. Defaults to None, without an upper bound.
+            func (callable, optional): Function of the numpy array of the column values,
+                                       returning a boolean array. Defaults to None.
+
+        Returns:
+            ProfileSelector: The selector, so that calls can be chained.
+        """
+        self.steps.append(("where", column, (low, high, func)))
+        return self
+
+
+    def thin(self, column="star_age", per=None, n=1, log=False):
+        """Keeps at most n profiles in every interval of width `per` of a column, e.g. one model per Δage.
+        The profiles kept in an interval are spread evenly over the profiles in it.
+
+        Args:
+            column (str, optional): The column. Defaults to "star_age".
+            per (float): Width of the intervals.
+            n (int, optional): Maximum number of profiles per interval. Defaults to 1.
+            log (bool, optional): Intervals of log10 of the column, e.g. per=0.1 for 10 models per dex. Defaults to False.
+
+        Raises:
+            ValueError: If per or n is not positive.
+
+        Returns:
+            ProfileSelector: The selector, so that calls can be chained.
+        """
+        if per is None or per <= 0:
+            raise ValueError("The interval width 'per' must be positive.")
+        if n < 1:
+            raise ValueError("The number of profiles per interval 'n' must be at least 1.")
+        self.steps.append(("thin", column, (per, n, log)))
+        return self
+
+
+    def table(self, logs_dir, data_format="GYRE", columns=()):
+        """Returns the columns of all profiles of a LOGS directory, joined by model number.
+
+        Args:
+            logs_dir (str): The LOGS directory.
+            data_format (str, optional): The pulsation data format of the profile files. Defaults to "GYRE".
+            columns (iterable, optional): Additional history columns to read. Defaults to ().
+
+        Returns:
+            dict: {"file": profile files, column name: numpy array}, in evolutionary order.
+                  Values are NaN for profiles without a line in profiles.index or a row in the history file.
+        """
+        profiles = scan_profiles(logs_dir, data_format)
+        table = {"file": [profile[0] for profile in profiles]}
+        for i, column in enumerate(INDEX_COLUMNS, 1):
+            table[column] = np.array([np.nan if profile[i] is None else profile[i] for profile in profiles], dtype=float)
+        needed = list(dict.fromkeys([*columns, *(column for _, column, _ in self.steps)]))
+        needed = [column for column in needed if column not in INDEX_COLUMNS]
+        if needed:
+            history = read_history(os.path.join(logs_dir, self.history), needed)
+            models = history["model_number"]
+            position = np.searchsorted(models, table["model_number"])
+            found = position < len(models)
+            found[found] = models[position[found]] == table["model_number"][found]
+            for column in needed:
+                table[column] = np.full(len(profiles), np.nan)
+                table[column][found] = history[column][position[found]]
+        return table
+
+
+    def resolve(self, logs_dir, data_format="GYRE"):
+        """Returns the profile files of a LOGS directory that meet all criteria.
+
+        Args:
+            logs_dir (str): The LOGS directory.
+            data_format (str, optional): The pulsation data format of the profile files. Defaults to "GYRE".
+
+        Returns:
+            list: The selected profile files, in evolutionary order.
+        """
+        table = self.table(logs_dir, data_format)
+        selected = np.arange(len(table["file"]))
+        for kind, column, args in self.steps:
+            values = table[column][selected]
+            if kind == "where":
+                low, high, func = args
+                with np.errstate(invalid="ignore"):
+                    mask = ~np.isnan(values)
+                    if low is not None:
+                        mask &= values >= low
+                    if high is not None:
+                        mask &= values <= high
+                if func is not None:
+                    mask &= np.asarray(func(values), dtype=bool)
+                selected = selected[mask]
+            else:
+                per, n, log = args
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    if log:
+                        values = np.log10(values)
+                    valid = np.isfinite(values)
+                selected, values = selected[valid], values[valid]
+                if len(values) == 0:
+                    continue
+                _, bins, counts = np.unique(np.floor((values - values.min()) / per), return_inverse=True, return_counts=True)
+                ## The profiles of each interval, in evolutionary order
+                members = np.split(selected[np.argsort(bins, kind="stable")], np.cumsum(counts)[:-1])
+                kept = [group if len(group) <= n else group[np.unique(np.round(np.linspace(0, len(group) - 1, n)).astype(int))]
+                        for group in members]
+                selected = np.sort(np.concatenate(kept))
+        return [table["file"][i] for i in selected]
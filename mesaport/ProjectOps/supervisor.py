@@ -0,0 +1,180 @@
+import os
+import sys
+import shlex
+import asyncio
+import traceback
+from pathlib import Path
+
+from rich import print
+
+from ..Access import GyreAccess
+from .ops_helper import process_outline
+
+"""
+This module implements an asyncio supervisor for MESA and GYRE child processes.
+
+All children are watched from one event loop instead of one blocking thread or process per child.
+Their stdout and stderr are drained concurrently, so a child never blocks on a full stderr pipe,
+and the cost of supervising a child does not grow with the number of children running at the same time.
+
+Methods:
+    supervise(commands, wdir, log=None, env=None, on_line=None, on_error=None): Runs a child process to completion.
+    run_mesa(commands, wdir, runlog=os.devnull, env=None, silent=True): Runs MESA, as `ops_helper.run_subprocess` does.
+    run_gyre(gyre_ex, logs_dir, filename, gyre_in, ...): Runs GYRE on one profile.
+    gather_bounded(coroutines, limit=None): Awaits coroutines with at most `limit` of them running at once.
+"""
+
+## Largest chunk of output read from a child at once
+CHUNK_SIZE = 1 << 16
+
+
+async def supervise(commands, wdir, log=None, env=None, on_line=None, on_error=None):
+    """Runs a child process to completion, draining its stdout and stderr concurrently.
+
+    Args:
+        commands (str): The command line.
+        wdir (str): The working directory.
+        log (file, optional): Open file to which both streams are written. Defaults to None.
+        env (dict, optional): The environment variables. Defaults to None, inheriting the environment.
+        on_line (callable, optional): Called with every stdout line. Defaults to None.
+        on_error (callable, optional): Called with every stderr line. Defaults to None.
+
+    Returns:
+        int, str: The return code and the stderr output.
+    """
+    proc = await asyncio.create_subprocess_exec(*shlex.split(commands), cwd=wdir, env=env,
+                                                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    errors = []
+    async def drain(stream, callback, sink=None):
+        ## Reads whatever is available and splits it into lines, one await per chunk rather than per line
+        rest = b""
+        while True:
+            chunk = await stream.read(CHUNK_SIZE)
+            if not chunk:
+                lines = [rest] if rest else []
+            else:
+                *lines, rest = (rest + chunk).split(b"\n")
+                lines = [line + b"\n" for line in lines]
+            if lines:
+                text = b"".join(lines).decode(errors="replace")
+                if log is not None:
+                    log.write(text)
+                if sink is not None:
+                    sink.append(text)
+                if callback is not None:
+                    for line in text.splitlines(keepends=True):
+                        callback(line)
+            if not chunk:
+                break
+    try:
+        await asyncio.gather(drain(proc.stdout, on_line), drain(proc.stderr, on_error, errors))
+        returncode = await proc.wait()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    return returncode, "".join(errors)
+
+
+async def run_mesa(commands, wdir, runlog=os.devnull, env=None, silent=True):
+    """Runs MESA and follows its output, with the same results as `ops_helper.run_subprocess`.
+
+    Args:
+        commands (str): The command line, e.g. './rn'.
+        wdir (str): The project directory.
+        runlog (str, optional): The log file, appended to. Defaults to os.devnull.
+        env (dict, optional): The environment variables. Defaults to None, inheriting the environment.
+        silent (bool, optional): If False, the output is also printed. Defaults to True.
+
+    Returns:
+        tuple or bool: (termination code, age) or False if the run failed.
+    """
+    state = {"terminated": False, "termination_code": None, "age": 0}
+    def on_line(outline):
+        if silent is False:
+            sys.stdout.write(outline)
+        if "terminated evolution:" in outline or "ERROR" in outline:
+            state["terminated"] = True
+            state["termination_code"] = outline.split()[-1]
+        if "termination code:" in outline:
+            state["terminated"] = True
+            state["termination_code"] = outline.split()[-1]
+        if "photo" in outline and "does not exist" in outline:
+            state["terminated"] = True
+            state["termination_code"] = "photo does not exist"
+        age = process_outline(outline)
+        if age is not None:
+            state["age"] = age
+    ## Line buffered, so that the log can be followed while MESA runs
+    with open(runlog, "a+", buffering=1) as logfile:
+        returncode, error = await supervise(commands, wdir, log=logfile, env=env, on_line=on_line, on_error=sys.stdout.write)
+        logfile.write("\n\n"+("*"*100)+"\n\n")
+    if returncode or error:
+        print('The process raised an error:', returncode, error)
+        return False
+    elif state["terminated"] and state["termination_code"] is None:
+        return False
+    return state["termination_code"], state["age"]
+
+
+async def run_gyre(gyre_ex, logs_dir, filename, gyre_in, data_format="GYRE", gyre_input_params=None,
+                   runlog=os.devnull, env=None, silent=True, write_detail_output=False):
+    """Runs GYRE on one profile, from its own gyre<profile>.in rendered from gyre_in.
+    The output is appended to runlog in one write when GYRE finishes, so concurrent runs do not interleave.
+
+    Args:
+        gyre_ex (str): Path to the GYRE executable.
+        logs_dir (str): The directory with the profiles, in which GYRE runs.
+        filename (str): The profile file.
+        gyre_in (str): Path to the template GYRE input file.
+        data_format (str, optional): The data format of the profile file. Defaults to "GYRE".
+        gyre_input_params (dict or list of dicts, optional): GYRE input parameters. Defaults to None.
+        runlog (str, optional): The log file, appended to. Defaults to os.devnull.
+        env (dict, optional): The environment variables. Defaults to None, inheriting the environment.
+        silent (bool, optional): If False, the output is also printed. Defaults to True.
+        write_detail_output (bool, optional): Write GYRE detail output files. Defaults to False.
+
+    Returns:
+        bool: True if GYRE succeeded.
+    """
+    profile_stem = Path(filename).stem.split(".data")[0]
+    new_gyre_in = os.path.join(logs_dir, f"gyre{profile_stem}.in")
+    try:
+        GyreAccess().writeGyreIn(gyre_in, new_gyre_in, filename, data_format,
+                                 gyre_input_params=gyre_input_params, write_detail_output=write_detail_output)
+    except Exception as e:
+        print(traceback.format_exc())
+        print(f"Error: {e}")
+        return False
+    lines = []
+    returncode, error = await supervise(f"{gyre_ex} gyre{profile_stem}.in", logs_dir, env=env, on_line=lines.append,
+                                        on_error=None if silent else sys.stdout.write)
+    if silent is False:
+        sys.stdout.write("".join(lines))
+    with open(runlog, "a+") as logfile:
+        logfile.write("".join(lines) + error + "\n\n"+("*"*100)+"\n\n" + f"Done with {filename}.\n")
+    if returncode or error:
+        print('The process raised an error:', returncode, error)
+        return False
+    os.remove(new_gyre_in)
+    return True
+
+
+async def gather_bounded(coroutines, limit=None):
+    """Awaits coroutines concurrently, with at most `limit` of them running at once.
+
+    Args:
+        coroutines (iterable): The coroutines.
+        limit (int, optional): Maximum number running at once. Defaults to None, without a limit.
+
+    Returns:
+        list: The results, in the order of the coroutines.
+    """
+    if limit is None:
+        return await asyncio.gather(*coroutines)
+    semaphore = asyncio.Semaphore(limit)
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+    return await asyncio.gather(*(bounded(coroutine) for coroutine in coroutines))
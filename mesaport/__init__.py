@@ -1,6 +1,6 @@
 """
 .. include:: ../README.md
 """
-from .Access import MesaAccess, GyreAccess
-from .ProjectOps import ProjectOps
+from .Access import MesaAccess, MesaBinaryAccess, GyreAccess
+from .ProjectOps import ProjectOps, ProfileSelector, GyreStore
 from .Installer import Installer
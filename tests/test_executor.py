@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from mesaport.ProjectOps.executor import execute
+
+
+def _task(i):
+    ## Later tasks finish first, so completion order differs from submission order
+    time.sleep(0.001 * (i % 5))
+    return i
+
+
+@pytest.mark.parametrize("backend", ["thread", "process", "serial"])
+def test_index_is_task_position(backend):
+    tasks = [(i,) for i in range(30)]
+    outcomes = list(execute(_task, tasks, backend=backend, workers=2, initializer=None))
+    assert sorted(outcome.index for outcome in outcomes) == list(range(30))
+    for outcome in outcomes:
+        assert outcome.error is None
+        assert outcome.task == tasks[outcome.index]
+        assert outcome.result == outcome.index
+
+
+def test_idle_tasks_are_skipped():
+    def tasks():
+        for i in range(10):
+            if i % 3 == 0:
+                yield None
+            yield (i,)
+    outcomes = list(execute(_task, tasks(), backend="thread", workers=2, initializer=None))
+    assert sorted(outcome.index for outcome in outcomes) == list(range(10))
+    assert all(outcome.result == outcome.task[0] for outcome in outcomes)
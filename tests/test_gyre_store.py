@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from mesaport.ProjectOps.gyre_store import GyreStore
+
+
+def _write_logs(logs_dir, n):
+    logs_dir.mkdir()
+    with open(logs_dir / "profiles.index", "w") as file:
+        file.write(f"{n} models.    lines hold model number, priority, and log file number.\n")
+        for number in range(1, n + 1):
+            file.write(f"  {10*number}  1  {number}\n")
+    for number in range(1, n + 1):
+        with open(logs_dir / f"profile{number}-freqs.dat", "w") as file:
+            file.write("  1 2\n  l Re(freq)\n")
+            file.write(f"  0 {number}.25E+00\n  1 {number}.75E+00\n")
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_parallel_ingest_maps_rows_to_profiles(tmp_path, backend):
+    _write_logs(tmp_path / "LOGS", 100)
+    store = GyreStore(str(tmp_path / "store"))
+    assert store.ingest(str(tmp_path / "LOGS"), n_cores=2, backend=backend) == (100, 0, 0)
+    table = store.table(["l", "Re(freq)"])
+    assert len(table["l"]) == 200
+    ## Every mode was written with the number of its profile as the integer part of its frequency
+    assert np.array_equal(np.floor(table["Re(freq)"]).astype(int), table["profile_number"])
+    assert np.array_equal(table["model_number"], 10*table["profile_number"])
+    assert sorted(set(table["profile_number"].tolist())) == list(range(1, 101))